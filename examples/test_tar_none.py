@@ -0,0 +1,84 @@
+import os
+import time
+from pathlib import Path
+
+from dflow import Step, Workflow, download_artifact, upload_artifact
+from dflow.python import (OP, OPIO, Artifact, OPIOSign, PythonOPTemplate,
+                          upload_packages)
+
+if "__file__" in locals():
+    upload_packages.append(__file__)
+
+
+class Count(OP):
+    def __init__(self):
+        pass
+
+    @classmethod
+    def get_input_sign(cls):
+        return OPIOSign({
+            'idir': Artifact(Path),
+        })
+
+    @classmethod
+    def get_output_sign(cls):
+        return OPIOSign({
+            'content': str,
+        })
+
+    @OP.exec_sign_check
+    def execute(
+            self,
+            op_in: OPIO,
+    ) -> OPIO:
+        # the uncompressed tarball is extracted into a directory before the
+        # OP runs
+        assert op_in['idir'].is_dir()
+        return OPIO({
+            "content": (op_in['idir'] / "f1").read_text()
+            + (op_in['idir'] / "f2").read_text(),
+        })
+
+
+def make_idir():
+    idir = Path("tidir")
+    idir.mkdir(exist_ok=True)
+    (idir / "f1").write_text("foo")
+    (idir / "f2").write_text("bar")
+
+
+def test_tar_none_round_trip():
+    make_idir()
+    artifact = upload_artifact("tidir", archive="tar:none")
+    path_list = download_artifact(artifact, path="tar_none_download")
+    assert len(path_list) == 1
+    assert os.path.basename(path_list[0]) == "tidir"
+    assert (Path(path_list[0]) / "f1").read_text() == "foo"
+    assert (Path(path_list[0]) / "f2").read_text() == "bar"
+
+
+def test_tar_none():
+    wf = Workflow(name="tar-none")
+
+    make_idir()
+    artifact = upload_artifact("tidir", archive="tar:none")
+    step = Step(
+        name="step",
+        template=PythonOPTemplate(Count, image="python:3.8"),
+        artifacts={"idir": artifact},
+    )
+    wf.add(step)
+    wf.submit()
+
+    while wf.query_status() in ["Pending", "Running"]:
+        time.sleep(1)
+
+    assert wf.query_status() == "Succeeded"
+    step = wf.query_step(name="step")[0]
+    assert step.phase == "Succeeded"
+    assert step.outputs.parameters["content"].value == "foobar"
+
+
+if __name__ == "__main__":
+    test_tar_none_round_trip()
+    test_tar_none()
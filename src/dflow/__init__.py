@@ -1,3 +1,4 @@
+from .async_workflow import AsyncWorkflow
 from .common import LocalArtifact, S3Artifact
 from .config import config, s3_config, set_config, set_s3_config
 from .context import Context
@@ -15,7 +16,7 @@ from .steps import Steps
 from .task import Task
 from .utils import (copy_artifact, copy_s3, download_artifact, download_s3,
                     path_list_of_artifact, randstr, upload_artifact, upload_s3)
-from .workflow import DockerSecret, Workflow
+from .workflow import DockerSecret, Workflow, query_workflows
 
 __all__ = ["S3Artifact", "DAG", "Executor", "RemoteExecutor", "AutonamedDict",
            "IfExpression", "InputArtifact", "InputParameter", "Inputs",
@@ -27,4 +28,5 @@ __all__ = ["S3Artifact", "DAG", "Executor", "RemoteExecutor", "AutonamedDict",
            "download_artifact", "download_s3", "path_list_of_artifact",
            "s3_config", "upload_artifact", "upload_s3", "Workflow", "config",
            "Context", "randstr", "LocalArtifact", "set_config",
-           "set_s3_config", "DockerSecret", "argo_sum", "argo_concat"]
+           "set_s3_config", "DockerSecret", "argo_sum", "argo_concat",
+           "query_workflows", "AsyncWorkflow"]
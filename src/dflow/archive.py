@@ -0,0 +1,208 @@
+import contextlib
+import gzip
+import os
+import tarfile
+from typing import Dict, Optional
+
+from .config import config
+
+
+class ArchiveCodec:
+    """
+    Compression codec of tarball artifacts
+
+    Args:
+        name: name of the codec, used as the archive mode
+        suffix: suffix of the storage key of archives
+    """
+    # whether offsets in the tarball are offsets in the archive
+    indexable = False
+    # whether Argo extracts archives of the codec for input artifacts
+    argo = False
+
+    def __init__(
+            self,
+            name: str,
+            suffix: str,
+    ) -> None:
+        self.name = name
+        self.suffix = suffix
+
+    def writer(self, fileobj, level: int = None, threads: int = None):
+        """
+        Return a writable stream compressing into fileobj, closing the stream
+        should not close fileobj
+        """
+        raise NotImplementedError
+
+    def reader(self, fileobj):
+        """
+        Return a readable stream decompressing from fileobj
+        """
+        raise NotImplementedError
+
+
+class NonClosingStream:
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def write(self, data):
+        return self.fileobj.write(data)
+
+    def read(self, size=-1):
+        return self.fileobj.read(size)
+
+    def close(self):
+        pass
+
+
+class TarCodec(ArchiveCodec):
+    indexable = True
+
+    def writer(self, fileobj, level=None, threads=None):
+        return NonClosingStream(fileobj)
+
+    def reader(self, fileobj):
+        return NonClosingStream(fileobj)
+
+
+class GzipCodec(ArchiveCodec):
+    argo = True
+
+    def writer(self, fileobj, level=None, threads=None):
+        return gzip.GzipFile(fileobj=fileobj, mode="wb",
+                             compresslevel=9 if level is None else level)
+
+    def reader(self, fileobj):
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+
+
+class ZstdCodec(ArchiveCodec):
+    def writer(self, fileobj, level=None, threads=None):
+        import zstandard
+        cctx = zstandard.ZstdCompressor(
+            level=3 if level is None else level,
+            threads=0 if threads is None else threads)
+        return cctx.stream_writer(fileobj, closefd=False)
+
+    def reader(self, fileobj):
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(fileobj,
+                                                          closefd=False)
+
+
+class Lz4Codec(ArchiveCodec):
+    def writer(self, fileobj, level=None, threads=None):
+        import lz4.frame
+        return lz4.frame.LZ4FrameFile(
+            fileobj, mode="wb", compression_level=0 if level is None
+            else level)
+
+    def reader(self, fileobj):
+        import lz4.frame
+        return lz4.frame.LZ4FrameFile(fileobj, mode="rb")
+
+
+archive_codecs: Dict[str, ArchiveCodec] = {}
+
+
+def register_codec(codec: ArchiveCodec) -> None:
+    """
+    Register an archive codec, the codec can then be used as archive mode
+    """
+    archive_codecs[codec.name] = codec
+
+
+register_codec(GzipCodec("tar", ".tgz"))
+register_codec(GzipCodec("tar:gzip", ".tgz"))
+register_codec(TarCodec("tar:none", ".tar"))
+register_codec(ZstdCodec("tar:zstd", ".tar.zst"))
+register_codec(Lz4Codec("tar:lz4", ".tar.lz4"))
+
+
+def get_codec(archive: str) -> ArchiveCodec:
+    if archive not in archive_codecs:
+        raise RuntimeError("Archive type %s not supported" % archive)
+    return archive_codecs[archive]
+
+
+def detect_codec(key: str) -> Optional[ArchiveCodec]:
+    """
+    Detect the codec of an archive by its storage key
+
+    Args:
+        key: storage key of the archive
+    """
+    for codec in sorted(archive_codecs.values(),
+                        key=lambda c: len(c.suffix), reverse=True):
+        if key.endswith(codec.suffix):
+            return codec
+    return None
+
+
+def write_tar(
+        path: os.PathLike,
+        fileobj,
+        codec: ArchiveCodec,
+        level: int = None,
+        threads: int = None,
+        index: dict = None,
+) -> None:
+    """
+    Write a directory as a compressed tarball into fileobj, the directory is
+    added as the top directory of the tarball
+
+    Args:
+        path: local directory
+        fileobj: writable file object
+        codec: archive codec
+        level: compression level, default to config["archive_level"]
+        threads: compression threads, default to config["archive_threads"]
+        index: dict to be filled with the offset and size of the data of
+            each file in the uncompressed tarball by member name, None for
+            directories
+    """
+    if level is None:
+        level = config["archive_level"]
+    if threads is None:
+        threads = config["archive_threads"]
+    stream = codec.writer(fileobj, level=level, threads=threads)
+    last = []
+
+    def record(tarinfo):
+        # the data of the previous member ends where this header starts
+        if last:
+            add_index_entry(index, last[0], tf.offset)
+        last[:] = [tarinfo]
+        return tarinfo
+
+    try:
+        with tarfile.open(fileobj=stream, mode="w|", dereference=True) as tf:
+            tf.add(path, arcname=os.path.basename(path),
+                   filter=record if index is not None else None)
+            if last:
+                add_index_entry(index, last[0], tf.offset)
+    finally:
+        stream.close()
+
+
+def add_index_entry(index, tarinfo, end):
+    if tarinfo.isfile():
+        blocks = (tarinfo.size + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE
+        index[tarinfo.name] = [end - blocks * tarfile.BLOCKSIZE,
+                               tarinfo.size]
+    elif tarinfo.isdir():
+        index[tarinfo.name] = None
+
+
+@contextlib.contextmanager
+def open_tar(fileobj, codec: ArchiveCodec):
+    """
+    Open a compressed tarball from fileobj as a stream
+    """
+    stream = codec.reader(fileobj)
+    try:
+        with tarfile.open(fileobj=stream, mode="r|") as tf:
+            yield tf
+    finally:
+        stream.close()
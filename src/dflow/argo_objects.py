@@ -1,36 +1,51 @@
 import os
 import tempfile
 from collections import UserDict, UserList
-from typing import Any, List, Union
+from typing import Any, Dict, List, Union
 
 import jsonpickle
 
+from .archive import detect_codec
 from .config import config, s3_config
 from .io import S3Artifact
 from .utils import (download_artifact, download_s3, get_key, upload_artifact,
                     upload_s3)
 
 
+def wrap(value):
+    if isinstance(value, dict):
+        return ArgoObjectDict(value)
+    elif isinstance(value, list):
+        return ArgoObjectList(value)
+    return value
+
+
 class ArgoObjectDict(UserDict):
     """
-    Generate ArgoObjectDict and ArgoObjectList on initialization rather than
-    on __getattr__, otherwise modify a.b.c will not take effect
+    Generate ArgoObjectDict and ArgoObjectList for nested dicts and lists on
+    first access, and store them in place of the raw values, otherwise
+    modify a.b.c will not take effect
     """
 
     def __init__(self, d):
+        if isinstance(d, ArgoObjectDict):
+            # do not share the wrapped values with d
+            d = d.recover()
         super().__init__(d)
-        for key, value in self.items():
-            if isinstance(value, dict):
-                self.data[key] = ArgoObjectDict(value)
-            elif isinstance(value, list):
-                self.data[key] = ArgoObjectList(value)
+
+    def __getitem__(self, key):
+        value = self.data[key]
+        if isinstance(value, (dict, list)):
+            value = wrap(value)
+            self.data[key] = value
+        return value
 
     def __getattr__(self, key):
         if key == "data":
             return super().__getattr__(key)
 
         if key in self.data:
-            return self.data[key]
+            return self[key]
         else:
             raise AttributeError(
                 "'ArgoObjectDict' object has no attribute '%s'" % key)
@@ -42,6 +57,7 @@ class ArgoObjectDict(UserDict):
         self.data[key] = value
 
     def recover(self):
+        # values never accessed are still raw and returned as they are
         return {key: value.recover() if isinstance(value, (ArgoObjectDict,
                                                            ArgoObjectList))
                 else value for key, value in self.data.items()}
@@ -49,12 +65,18 @@ class ArgoObjectDict(UserDict):
 
 class ArgoObjectList(UserList):
     def __init__(self, li):
+        if isinstance(li, ArgoObjectList):
+            li = li.recover()
         super().__init__(li)
-        for i, value in enumerate(self.data):
-            if isinstance(value, dict):
-                self.data[i] = ArgoObjectDict(value)
-            elif isinstance(value, list):
-                self.data[i] = ArgoObjectList(value)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return super().__getitem__(i)
+        value = self.data[i]
+        if isinstance(value, (dict, list)):
+            value = wrap(value)
+            self.data[i] = value
+        return value
 
     def recover(self):
         return [value.recover() if isinstance(value, (ArgoObjectDict,
@@ -62,6 +84,80 @@ class ArgoObjectList(UserList):
                 else value for value in self.data]
 
 
+class ArgoBigParameter(ArgoObjectDict):
+    """
+    Parameter saved as artifact, whose value and type are downloaded on
+    first access
+    """
+
+    def __init__(self, name, artifact):
+        super().__init__({"name": name, "save_as_artifact": True})
+        object.__setattr__(self, "artifact", artifact)
+        object.__setattr__(self, "loaded", False)
+
+    def load(self):
+        if self.loaded:
+            return
+        object.__setattr__(self, "loaded", True)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            try:
+                download_artifact(self.artifact, path=tmpdir)
+                fs = os.listdir(tmpdir)
+                assert len(fs) == 1
+                with open(os.path.join(tmpdir, fs[0]), "r") as f:
+                    content = jsonpickle.loads(f.read())
+                if "type" in content:
+                    self.data["type"] = content["type"]
+                if "type" in content and content["type"] != str(str):
+                    self.data["value"] = jsonpickle.loads(content["value"])
+                else:
+                    self.data["value"] = content["value"]
+            except Exception:
+                pass
+
+    def __getattr__(self, key):
+        if key in ["value", "type"]:
+            self.load()
+        return super().__getattr__(key)
+
+    def __setattr__(self, key, value):
+        if key in ["value", "type"]:
+            self.load()
+        return super().__setattr__(key, value)
+
+    def __getitem__(self, key):
+        if key in ["value", "type"]:
+            self.load()
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        if key in ["value", "type"]:
+            self.load()
+        return super().__setitem__(key, value)
+
+    def __contains__(self, key):
+        if key in ["value", "type"]:
+            self.load()
+        return super().__contains__(key)
+
+    def __iter__(self):
+        # keys(), items() and dict(par) go through __iter__
+        self.load()
+        return super().__iter__()
+
+    def __len__(self):
+        self.load()
+        return super().__len__()
+
+    def __repr__(self):
+        self.load()
+        return super().__repr__()
+
+    def recover(self):
+        self.load()
+        return super().recover()
+
+
 class ArgoStep(ArgoObjectDict):
     def __init__(self, step):
         super().__init__(step)
@@ -107,27 +203,8 @@ class ArgoStep(ArgoObjectDict):
                         io.parameters = {}
                     if name[13:] in io.parameters:
                         continue
-                    with tempfile.TemporaryDirectory() as tmpdir:
-                        try:
-                            download_artifact(art, path=tmpdir)
-                            fs = os.listdir(tmpdir)
-                            assert len(fs) == 1
-                            with open(os.path.join(tmpdir, fs[0]), "r") as f:
-                                content = jsonpickle.loads(f.read())
-                                param = {"name": name[13:],
-                                         "save_as_artifact": True}
-                                if "type" in content:
-                                    param["type"] = content["type"]
-                                if "type" in content and content["type"] != \
-                                        str(str):
-                                    param["value"] = jsonpickle.loads(
-                                        content["value"])
-                                else:
-                                    param["value"] = content["value"]
-                                io.parameters[name[13:]
-                                              ] = ArgoObjectDict(param)
-                        except Exception:
-                            pass
+                    io.parameters[name[13:]] = ArgoBigParameter(name[13:],
+                                                                art)
 
     def modify_output_parameter(
             self,
@@ -184,11 +261,12 @@ class ArgoStep(ArgoObjectDict):
         elif s3_config["repo_type"] == "oss":
             self.outputs.artifacts[name].oss = ArgoObjectDict(
                 s3.oss().to_dict())
-        if s3.key[-4:] == ".tgz" and hasattr(self.outputs.artifacts[name],
-                                             "archive"):
+        codec = detect_codec(key=s3.key)
+        if codec is not None and codec.suffix == ".tgz" and hasattr(
+                self.outputs.artifacts[name], "archive"):
             del self.outputs.artifacts[name]["archive"]
-        elif s3.key[-4:] != ".tgz" and not hasattr(self.outputs.artifacts[
-                name], "archive"):
+        elif (codec is None or codec.suffix != ".tgz") and not hasattr(
+                self.outputs.artifacts[name], "archive"):
             self.outputs.artifacts[name]["archive"] = {"none": {}}
 
     def download_sliced_output_artifact(
@@ -252,6 +330,37 @@ class ArgoStep(ArgoObjectDict):
 
 
 class ArgoWorkflow(ArgoObjectDict):
+    """
+    Snapshot of an Argo workflow, indexes of its nodes by key, id, name,
+    phase and type are built on the first step lookup
+    """
+
+    def build_index(self):
+        if "index" in self.__dict__:
+            return self.__dict__["index"]
+        index = {"nodes": [], "key": {}, "id": {}, "name": {}, "phase": {},
+                 "type": {}}
+        if hasattr(self, "status") and hasattr(self.status, "nodes"):
+            # index the raw nodes, only matched ones are wrapped
+            nodes = [node for node in self.status.nodes.data.values()
+                     if node["startedAt"] is not None]
+            nodes.sort(key=lambda x: x["startedAt"])
+            index["nodes"] = nodes
+            for i, node in enumerate(nodes):
+                name = node["displayName"]
+                # steps in loops are named as name(0:...)
+                names = [name] + [name[:j] for j, c in enumerate(name)
+                                  if c == "(" and j > 0]
+                for field, values in [("key", [key_of_node(node)]),
+                                      ("id", [node["id"]]),
+                                      ("name", names),
+                                      ("phase", [node.get("phase")]),
+                                      ("type", [node.get("type")])]:
+                    for value in values:
+                        index[field].setdefault(value, []).append(i)
+        object.__setattr__(self, "index", index)
+        return index
+
     def get_step(
             self,
             name: Union[str, List[str]] = None,
@@ -270,27 +379,47 @@ class ArgoWorkflow(ArgoObjectDict):
             id = [id]
         if type is not None and not isinstance(type, list):
             type = [type]
-        step_list = []
-        if hasattr(self.status, "nodes"):
-            for step in self.status.nodes.values():
-                if step["startedAt"] is None:
-                    continue
-                step = ArgoStep(step)
-                if name is not None and not match(step.displayName, name):
-                    continue
-                if key is not None and step.key not in key:
-                    continue
-                if phase is not None and not (hasattr(step, "phase") and
-                                              step.phase in phase):
-                    continue
-                if type is not None and not (hasattr(step, "type") and
-                                             step.type in type):
-                    continue
-                if id is not None and step.id not in id:
-                    continue
-                step_list.append(step)
-        step_list.sort(key=lambda x: x["startedAt"])
-        return step_list
+        index = self.build_index()
+        # intersect candidates from the indexes, in order of startedAt
+        candidates = None
+        for field, values in [("key", key), ("id", id), ("name", name),
+                              ("phase", phase), ("type", type)]:
+            if values is None:
+                continue
+            ids = set()
+            for value in values:
+                ids.update(index[field].get(value, []))
+            candidates = ids if candidates is None else candidates & ids
+        if candidates is None:
+            candidates = range(len(index["nodes"]))
+        nodes = index["nodes"]
+        return [ArgoStep(nodes[i]) for i in sorted(candidates)]
+
+    def get_step_by_keys(
+            self,
+            keys: List[str],
+    ) -> Dict[str, List[ArgoStep]]:
+        """
+        Get steps of multiple keys in one pass
+
+        Args:
+            keys: keys of steps
+        Returns:
+            a dict from key to the list of steps with the key
+        """
+        index = self.build_index()
+        nodes = index["nodes"]
+        return {key: [ArgoStep(nodes[i]) for i in index["key"].get(key, [])]
+                for key in keys}
+
+
+def key_of_node(node):
+    if "inputs" not in node or "parameters" not in node["inputs"]:
+        return None
+    for par in node["inputs"]["parameters"]:
+        if par["name"] == "dflow_key" and par.get("value", "") != "":
+            return par["value"]
+    return None
 
 
 def match(n, names):
@@ -0,0 +1,352 @@
+import asyncio
+import functools
+import weakref
+from typing import AsyncIterator, Dict, List, Union
+
+from .argo_objects import ArgoStep, ArgoWorkflow
+from .config import config
+from .workflow import (WatchState, Workflow, invalidate_query_cache,
+                       parse_json_line)
+
+try:
+    from argo.workflows.client import V1alpha1WorkflowCreateRequest
+except Exception:
+    pass
+
+# aiohttp sessions by event loop, see get_session
+sessions = weakref.WeakKeyDictionary()
+
+
+def get_session():
+    """
+    Get the aiohttp session shared within the running event loop
+    """
+    import aiohttp
+    # sessions of closed loops can no longer be used or closed
+    for loop in list(sessions):
+        if loop.is_closed():
+            sessions.pop(loop, None)
+    loop = asyncio.get_event_loop()
+    session = sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(ssl=False, limit=100))
+        sessions[loop] = session
+    return session
+
+
+async def close_sessions() -> None:
+    """
+    Close the aiohttp session of the running event loop, should be awaited
+    before the loop is closed
+    """
+    session = sessions.pop(asyncio.get_event_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+class AsyncWorkflow(Workflow):
+    """
+    Workflow with coroutine methods for requests to Argo, so that many
+    workflows can be submitted and monitored in one event loop, requires
+    aiohttp
+
+    Args:
+        session: aiohttp client session, default to a session shared within
+            the event loop, see Workflow for other arguments
+    """
+
+    def __init__(self, *args, session=None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.session = session
+
+    def get_session(self):
+        return self.session if self.session is not None else get_session()
+
+    def get_headers(self):
+        headers = {}
+        if self.token is not None:
+            headers["Authorization"] = "Bearer %s" % self.token
+        return headers
+
+    async def call_api(self, path, method, query_params=None, body=None):
+        async with self.get_session().request(
+                method, self.host + path, params=query_params, json=body,
+                headers=self.get_headers(), raise_for_status=True) as response:
+            return await response.json(content_type=None)
+
+    async def run_requests(self, requests):
+        """
+        Send GET requests yielded by a generator (e.g. query_requests) to
+        Argo, return the result of the generator
+        """
+        try:
+            path, query_params = next(requests)
+            while True:
+                try:
+                    response = await self.call_api(
+                        path, 'GET', query_params=query_params)
+                except Exception as e:
+                    path, query_params = requests.throw(e)
+                else:
+                    path, query_params = requests.send(response)
+        except StopIteration as e:
+            return e.value
+
+    async def run_in_executor(self, func, *args, **kwargs):
+        return await asyncio.get_event_loop().run_in_executor(
+            None, functools.partial(func, *args, **kwargs))
+
+    async def submit(
+            self,
+            reuse_step: List[ArgoStep] = None,
+    ) -> ArgoWorkflow:
+        """
+        Submit the workflow
+
+        Args:
+            reuse_step: a list of steps to be reused in the workflow
+        """
+        if config["mode"] == "debug":
+            return await self.run_in_executor(super().submit, reuse_step)
+
+        assert self.id is None, "Do not submit a workflow repeatedly"
+        # rendering may upload artifacts and create config maps
+        manifest = await self.run_in_executor(self.convert_to_argo,
+                                              reuse_step=reuse_step)
+        body = self.api_instance.api_client.sanitize_for_serialization(
+            V1alpha1WorkflowCreateRequest(workflow=manifest))
+        response = await self.call_api(
+            '/api/v1/workflows/%s' % self.namespace, 'POST', body=body)
+        workflow = ArgoWorkflow(response)
+
+        self.id = workflow.metadata.name
+        self.uid = workflow.metadata.uid
+        print("Workflow has been submitted (ID: %s, UID: %s)" % (self.id,
+                                                                 self.uid))
+        return workflow
+
+    async def query(
+            self,
+            fields: List[str] = None,
+    ) -> ArgoWorkflow:
+        """
+        Query the workflow from Argo
+
+        Args:
+            fields: fields to be included in the response, e.g.
+                ["status.phase"], None for the whole workflow
+        Returns:
+            an ArgoWorkflow object
+        """
+        return ArgoWorkflow(await self.run_requests(
+            self.query_requests(fields)))
+
+    async def query_status(
+            self,
+    ) -> str:
+        """
+        Query the status of the workflow from Argo
+
+        Returns:
+            Pending, Running, Succeeded, Failed, Error, etc
+        """
+        if config["mode"] == "debug":
+            return await self.run_in_executor(super().query_status)
+        workflow = await self.query(fields=["status.phase"])
+        if "status" not in workflow or "phase" not in workflow.status:
+            return "Pending"
+        else:
+            return workflow.status.phase
+
+    async def query_step(
+            self,
+            name: Union[str, List[str]] = None,
+            key: Union[str, List[str]] = None,
+            phase: Union[str, List[str]] = None,
+            id: Union[str, List[str]] = None,
+            type: Union[str, List[str]] = None,
+    ) -> List[ArgoStep]:
+        """
+        Query the existing steps of the workflow from Argo
+
+        Args:
+            name: filter by name of step, support regex
+            key: filter by key of step
+            phase: filter by phase of step
+            id: filter by id of step
+            type: filter by type of step
+        Returns:
+            a list of steps
+        """
+        if config["mode"] == "debug":
+            return await self.run_in_executor(
+                super().query_step, name=name, key=key, phase=phase, id=id,
+                type=type)
+        workflow = await self.query(fields=["status.nodes"])
+        return workflow.get_step(name=name, key=key, phase=phase, id=id,
+                                 type=type)
+
+    async def query_step_by_keys(
+            self,
+            keys: List[str],
+    ) -> Dict[str, List[ArgoStep]]:
+        """
+        Query the existing steps of multiple keys with one query
+
+        Args:
+            keys: keys of steps
+        Returns:
+            a dict from key to the list of steps with the key
+        """
+        if config["mode"] == "debug":
+            steps = {key: [] for key in keys}
+            for step in await self.query_step(key=keys):
+                steps[step.key].append(step)
+            return steps
+        workflow = await self.query(fields=["status.nodes"])
+        return workflow.get_step_by_keys(keys)
+
+    async def query_keys_of_steps(
+            self,
+    ) -> List[str]:
+        """
+        Query the keys of existing steps of the workflow from Argo
+
+        Returns:
+            a list of keys
+        """
+        if config["mode"] == "debug":
+            return [step.key for step in await self.query_step()]
+        try:
+            workflow = await self.query(fields=["status.outputs"])
+            return [par["name"] for par in
+                    workflow.recover()["status"]["outputs"]["parameters"]]
+        except Exception:
+            return [step.key for step in await self.query_step()
+                    if step.key is not None]
+
+    async def watch(
+            self,
+            retries: int = 5,
+    ) -> AsyncIterator[ArgoStep]:
+        """
+        Watch the workflow through the event stream of Argo, yield steps
+        whose phase changed until the workflow finishes, reconnect from the
+        last seen resource version on disconnection
+
+        Args:
+            retries: maximum number of successive reconnections
+        Returns:
+            an asynchronous generator of steps with new phases
+        """
+        if config["mode"] == "debug":
+            phases = {}
+            while True:
+                for step in await self.query_step():
+                    if phases.get(step.key) != step.phase:
+                        phases[step.key] = step.phase
+                        yield step
+                if await self.query_status() in ["Succeeded", "Failed",
+                                                 "Error"]:
+                    return
+                await asyncio.sleep(1)
+
+        import aiohttp
+        state = WatchState(self.id)
+        while True:
+            try:
+                async with self.get_session().get(
+                        self.host + '/api/v1/workflow-events/%s' %
+                        self.namespace, params=state.query_params(),
+                        headers=self.get_headers(), raise_for_status=True,
+                        timeout=aiohttp.ClientTimeout(total=None)) \
+                        as response:
+                    # events may exceed the line limit of readline
+                    buf = b""
+                    async for chunk in response.content.iter_any():
+                        buf += chunk
+                        while b"\n" in buf:
+                            line, buf = buf.split(b"\n", 1)
+                            event = parse_json_line(line)
+                            if event is None:
+                                continue
+                            for step in state.handle_event(event):
+                                yield step
+                            if state.finished:
+                                return
+                raise RuntimeError("Event stream closed")
+            except Exception as e:
+                await asyncio.sleep(state.handle_error(e, retries))
+
+    async def wait(
+            self,
+            interval: float = 10,
+    ) -> str:
+        """
+        Wait until the workflow finishes
+
+        Args:
+            interval: interval in seconds of querying the status
+        Returns:
+            the final phase of the workflow
+        """
+        while True:
+            status = await self.query_status()
+            if status in ["Succeeded", "Failed", "Error"]:
+                return status
+            await asyncio.sleep(interval)
+
+    async def operate(self, operation: str) -> None:
+        if self.id is None:
+            raise RuntimeError("Workflow ID is None")
+        if operation in ["delete", "resume", "retry"]:
+            invalidate_query_cache(self.id)
+        if operation == "delete":
+            await self.call_api('/api/v1/workflows/%s/%s' % (
+                self.namespace, self.id), 'DELETE')
+        else:
+            await self.call_api('/api/v1/workflows/%s/%s/%s' % (
+                self.namespace, self.id, operation), 'PUT')
+
+    async def terminate(self) -> None:
+        """
+        Terminate the workflow
+        """
+        await self.operate("terminate")
+
+    async def delete(self) -> None:
+        """
+        Delete the workflow
+        """
+        await self.operate("delete")
+
+    async def resubmit(self) -> None:
+        """
+        Resubmit the workflow
+        """
+        await self.operate("resubmit")
+
+    async def resume(self) -> None:
+        """
+        Resume the workflow
+        """
+        await self.operate("resume")
+
+    async def retry(self) -> None:
+        """
+        Retry the workflow
+        """
+        await self.operate("retry")
+
+    async def stop(self) -> None:
+        """
+        Stop the workflow
+        """
+        await self.operate("stop")
+
+    async def suspend(self) -> None:
+        """
+        Suspend the workflow
+        """
+        await self.operate("suspend")
@@ -8,6 +8,9 @@ config = {
     "save_path_as_parameter": False,
     "catalog_dir_name": ".dflow",
     "archive_mode": "tar",
+    "upload_codec": None,
+    "archive_level": None,
+    "archive_threads": None,
     "util_image": "python:3.8",
     "util_image_pull_policy": None,
     "extender_image": "dptechnology/dflow-extender",
@@ -16,6 +19,16 @@ config = {
     "dispatcher_image_pull_policy": None,
     "save_keys_in_global_outputs": True,
     "mode": "default",
+    "query_cache": False,
+    "query_cache_dir": None,
+    "query_cache_size": 64,
+    "memoize_configmap_size": 512 * 1024,
+    "k8s_max_concurrency": 8,
+    "dedup_templates": True,
+    "share_bootstrap": True,
+    "compile_cache": True,
+    "compile_cache_dir": None,
+    "package_zip": False,
 }
 
 
@@ -36,7 +49,16 @@ def set_config(
         private_key_host_path: path of private key on the Kubernetes nodes
         save_path_as_parameter: save catalog of artifacts as parameters
         catalog_dir_name: catalog directory name for artifacts
-        archive_mode: "tar" for archiving with tar, None for no archive
+        archive_mode: "tar" for archiving with tar, None for no archive,
+            "tar:none" for uncompressed tar
+        upload_codec: codec of archives uploaded by upload_artifact, "tar",
+            "tar:none", "tar:zstd" or "tar:lz4", None for archive_mode,
+            archives of codecs other than "tar" are extracted by dflow in
+            pods instead of Argo
+        archive_level: compression level of archives, None for the default
+            level of the codec
+        archive_threads: number of compression threads for codecs supporting
+            multithreading (zstd), -1 for the number of CPUs
         util_image: image for util step
         util_image_pull_policy: image pull policy for util step
         extender_image: image for dflow extender
@@ -45,6 +67,34 @@ def set_config(
         dispatcher_image_pull_policy: image pull policy for dpdispatcher
         save_keys_in_global_outputs: save keys of steps in global outputs
         mode: "default" for normal, "debug" for debugging locally
+        query_cache: cache workflows queried from Argo in process, completed
+            or archived workflows are cached permanently, large responses
+            (e.g. with status.nodes) of others are reused while their
+            resource versions are unchanged
+        query_cache_dir: directory persisting cached completed workflows,
+            None for no persistence
+        query_cache_size: maximum number of responses cached in memory,
+            least recently used ones are evicted beyond it
+        memoize_configmap_size: target size in bytes of config maps packing
+            memoization entries of reused steps, leaving room for entries
+            written by Argo during the workflow
+        k8s_max_concurrency: maximum number of concurrent requests to
+            Kubernetes API server
+        dedup_templates: collapse templates identical except for their names
+            into one in the submitted workflow
+        share_bootstrap: upload the configurations and the source of OPs
+            defined in __main__ as an artifact shared by Python OP templates
+            uploading dflow instead of embedding them in each script
+        compile_cache: reuse results of compiling workflows (uploaded big
+            parameters, templates rendered by executors) by fingerprints of
+            their inputs
+        compile_cache_dir: directory persisting keys of uploaded big
+            parameters and python packages across processes, None for no
+            persistence
+        package_zip: deliver python packages of Python OP templates as a zip
+            with precompiled bytecode imported through zipimport, not for
+            packages with extension modules or reading files next to their
+            sources
     """
     config.update(kwargs)
 
@@ -62,6 +112,14 @@ s3_config = {
     "repo_prefix": "",
     "prefix": "",
     "storage_client": None,
+    "max_concurrency": 8,
+    "pool_size": None,
+    "stream_archive": True,
+    "part_size": 16 * 1024 * 1024,
+    "content_addressed": False,
+    "cache_dir": None,
+    "cache_size": 10 * 1024 ** 3,
+    "compact_catalog": False,
 }
 
 
@@ -84,5 +142,26 @@ def set_s3_config(
         repo_prefix: prefix of artifact repository, parsed from repo_key
         prefix: prefix of storage key
         storage_client: client for plugin storage backend
+        max_concurrency: maximum number of objects transferred concurrently
+            in upload, download and copy, 1 for serial
+        pool_size: size of the keep-alive connection pool of each storage
+            client, default to max(10, max_concurrency)
+        stream_archive: pipe tarballs into uploads and extract them while
+            downloading, if the storage client supports streaming
+        part_size: part size in bytes of streaming multipart uploads
+        content_addressed: key uploaded artifacts by the digest of their
+            content, and skip uploading artifacts already in the storage
+        cache_dir: local directory caching downloaded objects by key and
+            etag, None for no cache, cached objects are cloned into the
+            download path by reflinks if the filesystem supports them,
+            otherwise copied
+        cache_size: maximum size in bytes of the download cache, least
+            recently used objects are evicted beyond it
+        compact_catalog: merge the catalog files of an artifact into one
+            object on the first read of its catalog, and read that object
+            afterwards, needs write permission on the bucket, the object is
+            stored at "<prefix><catalog_dir_name>/<key>" outside the
+            artifact and is not removed with it, delete it as well when
+            deleting the artifact
     """
     s3_config.update(kwargs)
@@ -6,19 +6,24 @@ from typing import Any, Dict, List, Union
 
 import jsonpickle
 
+from .archive import archive_codecs
 from .common import S3Artifact
 from .config import config
-from .utils import randstr, s3_config, upload_s3
+from .utils import (get_compile_cache, get_fingerprint, get_storage_client,
+                    randstr, s3_config, set_compile_cache, upload_s3)
 
 try:
     from argo.workflows.client import (V1alpha1ArchiveStrategy, V1alpha1Inputs,
-                                       V1alpha1Outputs, V1alpha1RawArtifact)
+                                       V1alpha1Outputs, V1alpha1RawArtifact,
+                                       V1alpha1TarStrategy)
 
     from .client import V1alpha1Artifact, V1alpha1Parameter, V1alpha1ValueFrom
 except Exception:
     pass
 
 NotAllowedInputArtifactPath = ["/", "/tmp"]
+# keys of big parameters from the compile cache known to exist in the storage
+checked_bigpar_keys = set()
 
 
 class AutonamedDict(UserDict):
@@ -333,19 +338,37 @@ class InputParameter(ArgoVar):
                                             path=self.path,
                                             _from=str(self.value))
                 else:
-                    with tempfile.TemporaryDirectory() as tmpdir:
-                        content = {}
-                        if isinstance(self.value, str):
-                            content["value"] = self.value
+                    content = {}
+                    if isinstance(self.value, str):
+                        content["value"] = self.value
+                    else:
+                        content["value"] = jsonpickle.dumps(self.value)
+                    if self.type is not None:
+                        content["type"] = str(self.type)
+                    content = jsonpickle.dumps(content)
+                    # identical values uploaded before are not uploaded again
+                    fingerprint = get_fingerprint([
+                        self.name, content] + [s3_config[k] for k in [
+                            "endpoint", "bucket_name", "repo_key", "prefix"]])
+                    key = get_compile_cache("bigpar", fingerprint,
+                                            persistent=True)
+                    # the object may have been removed from the storage,
+                    # check once in the process
+                    if key is not None and key not in checked_bigpar_keys:
+                        if get_storage_client().list(prefix=key):
+                            checked_bigpar_keys.add(key)
                         else:
-                            content["value"] = jsonpickle.dumps(self.value)
-                        if self.type is not None:
-                            content["type"] = str(self.type)
-                        path = tmpdir + "/" + self.name
-                        with open(path, "w") as f:
-                            f.write(jsonpickle.dumps(content))
-                        key = upload_s3(path)
-                        s3 = S3Artifact(key=key)
+                            key = None
+                    if key is None:
+                        with tempfile.TemporaryDirectory() as tmpdir:
+                            path = tmpdir + "/" + self.name
+                            with open(path, "w") as f:
+                                f.write(content)
+                            key = upload_s3(path)
+                        set_compile_cache("bigpar", fingerprint, key,
+                                          persistent=True)
+                        checked_bigpar_keys.add(key)
+                    s3 = S3Artifact(key=key)
                     if s3_config["repo_type"] == "s3":
                         return V1alpha1Artifact(
                             name="dflow_bigpar_" + self.name, path=self.path,
@@ -690,7 +713,9 @@ class OutputArtifact(ArgoVar):
         type: artifact type
         save: place to store the output artifact instead of default storage,
             can be a list
-        archive: compress format of the artifact, None for no compression
+        archive: compress format of the artifact, None for no compression,
+            "tar" for gzip compressed tar, "tar:none" for tar without
+            compression
         global_name: global name of the artifact within the workflow
         from_expression: the artifact is from an expression
     """
@@ -809,10 +834,20 @@ class OutputArtifact(ArgoVar):
             "global_name": self.global_name
         }
 
+        # Argo only archives with gzip, whose compression level is tunable,
+        # other codecs (e.g. zstd, lz4) fall back to gzip
         if self.archive is None:
             kwargs["archive"] = V1alpha1ArchiveStrategy(_none={})
-        elif self.archive == "tar":
-            kwargs["archive"] = None
+        elif self.archive == "tar:none":
+            kwargs["archive"] = V1alpha1ArchiveStrategy(
+                tar=V1alpha1TarStrategy(compression_level=0))
+        elif self.archive in archive_codecs:
+            if config["archive_level"] is None:
+                kwargs["archive"] = None
+            else:
+                kwargs["archive"] = V1alpha1ArchiveStrategy(
+                    tar=V1alpha1TarStrategy(
+                        compression_level=config["archive_level"]))
         else:
             raise RuntimeError("Archive type %s not supported" % self.archive)
 
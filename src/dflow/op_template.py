@@ -68,10 +68,14 @@ class OPTemplate:
             value.set_template(self)
 
     def handle_key(self, memoize_prefix=None, memoize_configmap="dflow"):
+        configmap_name = None
         if "dflow_key" in self.inputs.parameters:
             if memoize_prefix is not None:
                 self.memoize_key = "%s-{{inputs.parameters.dflow_key}}" \
                     % memoize_prefix
+                # entries are packed into config maps by the workflow, which
+                # passes the name (template) of the config map for the key
+                configmap_name = memoize_configmap
 
             if global_config["save_keys_in_global_outputs"]:
                 if hasattr(self, "image"):
@@ -99,7 +103,8 @@ class OPTemplate:
                 key=self.memoize_key,
                 local_vars_configuration=config, cache=V1alpha1Cache(
                     config_map=V1ConfigMapKeySelector(
-                        name="%s-%s" % (memoize_configmap, self.memoize_key),
+                        name=configmap_name if configmap_name is not None
+                        else "%s-%s" % (memoize_configmap, self.memoize_key),
                         local_vars_configuration=config)))
 
 
@@ -1,5 +1,6 @@
 import json
 import os
+import threading
 from copy import deepcopy
 from getpass import getpass
 
@@ -18,6 +19,9 @@ config = {
     "project_id": None,
     "tiefblue_url": "https://tiefblue.dp.tech",
 }
+# process-wide tiefblue clients keyed by url and token
+tiefblue_clients = {}
+tiefblue_clients_lock = threading.Lock()
 
 
 def _raise_error(res, op):
@@ -226,20 +230,26 @@ class TiefblueClient:
         self.token = res["data"]["token"]
         self.prefix = res["data"]["path"]
 
-    def upload(self, key, path, **kwargs):
+    def get_client(self):
         import tiefblue
-        client = tiefblue.Client(base_url=self.tiefblue_url, token=self.token)
+        key = (os.getpid(), self.tiefblue_url, self.token)
+        with tiefblue_clients_lock:
+            if key not in tiefblue_clients:
+                tiefblue_clients[key] = tiefblue.Client(
+                    base_url=self.tiefblue_url, token=self.token)
+            return tiefblue_clients[key]
+
+    def upload(self, key, path, **kwargs):
+        client = self.get_client()
         client.upload_from_file(key, path)
 
     def download(self, key, path, **kwargs):
-        import tiefblue
-        client = tiefblue.Client(base_url=self.tiefblue_url, token=self.token)
+        client = self.get_client()
         os.makedirs(os.path.dirname(path), exist_ok=True)
         client.download_from_file(key, path)
 
     def list(self, prefix, recursive=False):
-        import tiefblue
-        client = tiefblue.Client(base_url=self.tiefblue_url, token=self.token)
+        client = self.get_client()
         keys = []
         next_token = ""
         while True:
@@ -255,12 +265,10 @@ class TiefblueClient:
         return keys
 
     def copy(self, src, dst):
-        import tiefblue
-        client = tiefblue.Client(base_url=self.tiefblue_url, token=self.token)
+        client = self.get_client()
         client.copy(src, dst)
 
     def get_md5(self, key):
-        import tiefblue
-        client = tiefblue.Client(base_url=self.tiefblue_url, token=self.token)
+        client = self.get_client()
         meta = client.meta(key)
         return meta["entityTag"] if "entityTag" in meta else ""
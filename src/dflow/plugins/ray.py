@@ -105,8 +105,17 @@ class RayClusterExecutor(Executor):
                               " use {os.environ['RAY_ADDRESS']} instead.\") " \
                               "\n" \
                               + template.script
-        # To locate the initialization of package path in `python_op_template`.
-        insert_index = new_template.script.find('from dflow import config')
+        # To locate the initialization of package path in `python_op_template`,
+        # followed by the bootstrap either shared or inlined.
+        for anchor in ['from dflow.python.utils import run_bootstrap',
+                       'from dflow import config']:
+            insert_index = new_template.script.find(anchor)
+            if insert_index != -1:
+                break
+        else:
+            raise RuntimeError(
+                'Failed to locate the bootstrap in the script of template '
+                '%s' % template.name)
         new_script = list(new_template.script)
         _dependencies_str = ','.join(item.__name__
                                      for item in self.ray_dependencies)
@@ -9,6 +9,7 @@ from abc import ABC
 
 from typeguard import check_type
 
+from ..archive import detect_codec
 from ..argo_objects import ArgoObjectDict
 from ..utils import get_key, s3_config
 from .opio import (OPIO, Artifact, BigParameter, OPIOSign, Parameter,
@@ -53,7 +54,7 @@ class OP(ABC):
         """
 
     def _get_s3_link(self, key):
-        if key[-4:] != ".tgz":
+        if detect_codec(key=key) is None:
             key += "/"
         encoded_key = base64.b64encode(key.encode()).decode()
         return "%s/buckets/%s/browse/%s" % (
@@ -28,7 +28,9 @@ class Artifact:
 
     Args:
         type: str, Path, Set[str], Set[Path], List[str] or List[Path]
-        archive: compress format of the artifact, None for no compression
+        archive: compress format of the artifact, None for no compression,
+            "tar" for gzip compressed tar, "tar:none" for tar without
+            compression
         save: place to store the output artifact instead of default storage,
             can be a list
         optional: optional input artifact or not
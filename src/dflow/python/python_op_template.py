@@ -1,8 +1,12 @@
+import atexit
+import hashlib
 import inspect
 import json
 import os
 import random
+import shutil
 import string
+import tempfile
 from pathlib import Path
 from typing import Any, Dict, List, Union
 
@@ -74,6 +78,32 @@ class Slices:
         self.pool_size = pool_size
 
 
+# directory of bootstrap files, see get_bootstrap_file
+bootstrap_dir = None
+
+
+def get_bootstrap_file(source: str) -> str:
+    """
+    Write a bootstrap source to a local file named by its content, so that
+    templates with the same source share the file
+
+    Args:
+        source: python source
+    Returns:
+        path of the file
+    """
+    global bootstrap_dir
+    if bootstrap_dir is None:
+        bootstrap_dir = tempfile.mkdtemp(prefix="dflow-bootstrap-")
+        atexit.register(shutil.rmtree, bootstrap_dir, ignore_errors=True)
+    path = os.path.join(bootstrap_dir, "dflow_bootstrap_%s.py" % hashlib.
+                        sha256(source.encode("utf-8")).hexdigest()[:16])
+    if not os.path.exists(path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+    return path
+
+
 def get_source_code(o):
     source_lines, start_line = inspect.getsourcelines(o)
     with open(inspect.getsourcefile(o), "r",
@@ -259,6 +289,7 @@ class PythonOPTemplate(PythonScriptOPTemplate):
         else:
             python_packages = upload_packages + [python_packages]
 
+        self.upload_dflow = upload_dflow
         if upload_dflow:
             python_packages += __path__
             python_packages += jsonpickle.__path__
@@ -368,20 +399,24 @@ class PythonOPTemplate(PythonScriptOPTemplate):
             script += "        with open(os.path.join(catalog_dir, f), 'r')"\
                 " as fd:\n"
             script += "            for item in json.load(fd)['path_list']:\n"
-            script += "                sys.path.insert(0, os.path.join("\
-                "package_root, os.path.dirname(item['dflow_list_item'])))\n"
-
-        script += "import json, jsonpickle\n"
-        script += "from dflow import config, s3_config\n"
-        script += "config.update(json.loads('%s'))\n" % json.dumps(config)
-        script += "s3_config.update(jsonpickle.loads('%s'))\n" % \
+            script += "                p = os.path.join(package_root, "\
+                "item['dflow_list_item'])\n"
+            # zipped packages are imported through zipimport
+            script += "                sys.path.insert(0, p if p.endswith("\
+                "'.zip') else os.path.dirname(p))\n"
+
+        preamble = "import json, jsonpickle\n"
+        preamble += "from dflow import config, s3_config\n"
+        preamble += "config.update(json.loads('%s'))\n" % json.dumps(config)
+        preamble += "s3_config.update(jsonpickle.loads('%s'))\n" % \
             jsonpickle.dumps(s3_config)
+        source = ""
         if op_class.__module__ in ["__main__", "__mp_main__"]:
             try:
                 if hasattr(op_class, "func"):
-                    script += get_source_code(op_class.func)
+                    source += get_source_code(op_class.func)
                 else:
-                    script += get_source_code(op_class)
+                    source += get_source_code(op_class)
             except Exception:
                 import cloudpickle
                 if self.python_packages:
@@ -389,15 +424,37 @@ class PythonOPTemplate(PythonScriptOPTemplate):
                 else:
                     self.python_packages = set(cloudpickle.__path__)
 
-                script += "import cloudpickle\n"
+                source += "import cloudpickle\n"
                 if hasattr(op_class, "func"):
-                    script += "from dflow.python import OP\n"
-                    script += "%s = OP.function(cloudpickle.loads(%s))\n" % \
+                    source += "from dflow.python import OP\n"
+                    source += "%s = OP.function(cloudpickle.loads(%s))\n" % \
                         (class_name, cloudpickle.dumps(op_class.func))
                 else:
-                    script += "%s = cloudpickle.loads(%s)\n" % \
+                    source += "%s = cloudpickle.loads(%s)\n" % \
                         (class_name, cloudpickle.dumps(op_class))
 
+        self.bootstrap_files = None
+        # run_bootstrap may be missing in dflow of the image if dflow is not
+        # uploaded
+        if config["share_bootstrap"] and getattr(self, "upload_dflow",
+                                                 False):
+            # store the preamble and the source once as an artifact instead
+            # of repeating them in the scripts of templates
+            self.bootstrap_files = set()
+            names = []
+            for s in [preamble, source]:
+                if s:
+                    path = get_bootstrap_file(s)
+                    self.bootstrap_files.add(path)
+                    names.append(os.path.basename(path))
+            self.inputs.artifacts["dflow_bootstrap"] = InputArtifact(
+                path="%s/inputs/artifacts/dflow_bootstrap" % self.tmp_root)
+            script += "from dflow.python.utils import run_bootstrap\n"
+            script += "run_bootstrap('%s/inputs/artifacts/dflow_bootstrap', "\
+                "%s, globals())\n" % (self.tmp_root, names)
+        else:
+            self.inputs.artifacts.pop("dflow_bootstrap", None)
+            script += preamble + source
         script += "import os, sys, traceback, jsonpickle\n"
         script += "from dflow.python import OPIO, TransientError, FatalError\n"
         script += "from dflow.python.utils import handle_input_artifact," \
@@ -8,7 +8,7 @@ import jsonpickle
 
 from ..config import config
 from ..utils import (assemble_path_list, convert_dflow_list, copy_file,
-                     remove_empty_dir_tag)
+                     extract_archive, remove_empty_dir_tag)
 from .opio import BigParameter, Parameter
 
 
@@ -20,6 +20,7 @@ def handle_input_artifact(name, sign, slices=None, data_root="/tmp",
         art_path = '%s/inputs/artifacts/%s/%s' % (data_root, name, sub_path)
     if not os.path.exists(art_path):  # for optional artifact
         return None
+    extract_archive(art_path)
     remove_empty_dir_tag(art_path)
     path_list = assemble_path_list(art_path)
     if slices is not None:
@@ -45,6 +46,23 @@ def handle_input_artifact(name, sign, slices=None, data_root="/tmp",
         return set(map(path_or_none, path_list))
 
 
+def run_bootstrap(root, names, namespace):
+    """
+    Execute bootstrap sources shared by templates (see PythonOPTemplate) in
+    the namespace of the script
+
+    Args:
+        root: local path of the bootstrap artifact
+        names: file names of the bootstrap sources in order
+        namespace: globals of the script
+    """
+    paths = {os.path.basename(p): p for p in assemble_path_list(root)
+             if p is not None}
+    for name in names:
+        with open(paths[name], "r", encoding="utf-8") as f:
+            exec(compile(f.read(), paths[name], "exec"), namespace)
+
+
 def path_or_none(p):
     if p is None:
         return None
@@ -17,7 +17,9 @@ from .op_template import OPTemplate, PythonScriptOPTemplate, ShellOPTemplate
 from .python import Slices
 from .resource import Resource
 from .util_ops import CheckNumSuccess, CheckSuccessRatio, InitArtifactForSlices
-from .utils import catalog_of_artifact, merge_dir, randstr, upload_artifact
+from .utils import (catalog_of_artifact, get_compile_cache, get_fingerprint,
+                    merge_dir, randstr, set_compile_cache, upload_artifact,
+                    upload_packages_artifact)
 
 try:
     from argo.workflows.client import (V1alpha1Arguments, V1alpha1ContinueOn,
@@ -29,7 +31,9 @@ except Exception:
     V1alpha1Sequence = object
 
 
-uploaded_python_packages = []
+# artifacts of uploaded python packages by the set of local paths
+uploaded_python_packages = {}
+uploaded_bootstrap_files = {}
 
 
 class FutureLen:
@@ -322,15 +326,21 @@ class Step:
 
         if hasattr(self.template, "python_packages") and \
                 self.template.python_packages:
-            hit = list(filter(lambda x: x[0] == self.template.python_packages,
-                              uploaded_python_packages))
-            if len(hit) > 0:
-                self.set_artifacts({"dflow_python_packages": hit[0][1]})
-            else:
-                artifact = upload_artifact(self.template.python_packages)
-                self.set_artifacts({"dflow_python_packages": artifact})
-                uploaded_python_packages.append(
-                    (self.template.python_packages, artifact))
+            packages = frozenset(self.template.python_packages)
+            if packages not in uploaded_python_packages:
+                uploaded_python_packages[packages] = upload_packages_artifact(
+                    packages)
+            self.set_artifacts({
+                "dflow_python_packages": uploaded_python_packages[packages]})
+
+        if getattr(self.template, "bootstrap_files", None):
+            files = frozenset(self.template.bootstrap_files)
+            if files not in uploaded_bootstrap_files:
+                # extracted by Argo, as dflow may not be importable before
+                uploaded_bootstrap_files[files] = upload_artifact(
+                    sorted(files), archive="tar")
+            self.set_artifacts({
+                "dflow_bootstrap": uploaded_bootstrap_files[files]})
 
         if self.key is not None:
             self.template.inputs.parameters["dflow_key"] = InputParameter(
@@ -1020,7 +1030,15 @@ class Step:
 
         if self.executor is not None:
             assert isinstance(self.executor, Executor)
-            self.template = self.executor.render(self.template)
+            # identical templates rendered by identical executors are
+            # reused, except those to be modified for the step below
+            fingerprint = None if self.use_resource is not None else \
+                get_fingerprint([self.executor, self.template])
+            template = get_compile_cache("executor", fingerprint)
+            if template is None:
+                template = self.executor.render(self.template)
+                set_compile_cache("executor", fingerprint, template)
+            self.template = template
 
         if self.use_resource is not None:
             self.template.resource = V1alpha1ResourceTemplate(
@@ -1,32 +1,50 @@
 import contextlib
+import copy
 import hashlib
 import inspect
+import json
 import logging
 import os
 import pkgutil
+import py_compile
 import random
 import shutil
 import string
 import subprocess
 import sys
-import tarfile
 import tempfile
+import threading
 import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from pathlib import Path
-from typing import List, Optional, Set, Tuple, Union
+from typing import Callable, List, Optional, Set, Tuple, Union
 
 import jsonpickle
 
+from .archive import detect_codec, get_codec, open_tar, write_tar
 from .common import LocalArtifact, S3Artifact
 from .config import config, s3_config
 
 try:
+    import certifi
+    import urllib3
     from minio import Minio
     from minio.api import CopySource
 except Exception:
     pass
 
+# process-wide storage clients, see get_storage_client
+storage_clients = {}
+storage_clients_lock = threading.Lock()
+# parsed catalogs of artifacts by key, see catalog_of_artifact
+catalog_cache = {}
+catalog_cache_lock = threading.Lock()
+# results of compiling workflows by fingerprint, see get_compile_cache
+compile_cache = {}
+compile_cache_lock = threading.Lock()
+
 
 def get_key(artifact, raise_error=True):
     if hasattr(artifact, "s3") and hasattr(artifact.s3, "key"):
@@ -51,17 +69,22 @@ def download_artifact(
         artifact,
         extract: bool = True,
         sub_path: str = None,
-        slice: int = None,
+        slice: Union[int, List[int]] = None,
         **kwargs,
 ) -> List[str]:
     """
-    Download an artifact from Argo to local
+    Download an artifact from Argo to local, return the path list of the
+    artifact, or local paths of the sub path or slices if specified
+
+    Slices of tarballs archived without compression by upload_artifact are
+    fetched by ranged reads, those of other tarballs are picked out of the
+    whole tarball
 
     Args:
         artifact: artifact to be downloaded
         extract: extract files if the artifact is compressed
         sub_path: download a subdir of an artifact
-        slice: download a slice of an artifact
+        slice: download a slice or a list of slices of an artifact
         path: local path
         endpoint: endpoint for Minio
         access_key: access key for Minio
@@ -69,6 +92,7 @@ def download_artifact(
         secure: secure or not for Minio
         bucket_name: bucket name for Minio
         skip_exists: skip files with the same MD5
+        max_concurrency: maximum number of objects downloaded concurrently
     """
     if config["mode"] == "debug":
         path = kwargs["path"] if "path" in kwargs else "."
@@ -77,43 +101,241 @@ def download_artifact(
 
     key = get_key(artifact)
 
+    codec = None
+    if extract:
+        codec = detect_codec(key=key)
+        wrapped = get_wrapped_archive(key, **kwargs) if codec is None \
+            else None
+        if wrapped is not None:
+            key, codec = wrapped
+    if codec is not None and (slice is not None or sub_path is not None):
+        sub_paths = None if sub_path is None else [sub_path]
+        slices = None if slice is None else \
+            slice if isinstance(slice, list) else [slice]
+        return download_archive_items(key, codec, sub_paths, slices,
+                                      **kwargs)
+
+    if isinstance(slice, list):
+        path_list = path_list_of_artifact(artifact, **kwargs)
+        res = []
+        for i in slice:
+            res += download_artifact(artifact, extract=extract,
+                                     sub_path=path_list[i], **kwargs)
+        return res
+
     if slice is not None:
-        sub_path = path_list_of_artifact(artifact)[slice]
+        sub_path = path_list_of_artifact(artifact, **kwargs)[slice]
 
     if sub_path is not None:
-        key = key + "/" + sub_path
-        if "path" in kwargs:
-            kwargs["path"] = os.path.join(kwargs["path"],
-                                          os.path.dirname(sub_path))
+        key = key + "/" + sub_path.strip("/")
+        root = kwargs["path"] if kwargs.get("path") is not None else "."
+        if get_storage_client(**kwargs).list(prefix=key + "/"):
+            # a directory
+            kwargs["path"] = os.path.join(root, sub_path)
         else:
-            kwargs["path"] = os.path.join(".", os.path.dirname(sub_path))
-
-    path = download_s3(key=key, recursive=True, **kwargs)
-    if key[-4:] == ".tgz" and extract:
-        path = os.path.join(path, os.path.basename(key))
-        tf = tarfile.open(path, "r:gz")
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tf.extractall(tmpdir)
-            tf.close()
-
+            kwargs["path"] = os.path.join(root, os.path.dirname(sub_path))
+        download_s3(key=key, recursive=True, **kwargs)
+        remove_empty_dir_tag(kwargs["path"])
+        return [os.path.join(root, sub_path)]
+
+    client = get_storage_client(**kwargs)
+    if codec is not None and s3_config["stream_archive"] and \
+            s3_config["cache_dir"] is None and \
+            hasattr(client, "download_stream"):
+        # extract while downloading
+        path = kwargs["path"] if kwargs.get("path") is not None else "."
+        with client.download_stream(key=key) as stream:
+            with open_tar(stream, codec) as tf:
+                extract_tar(tf, path)
+    else:
+        path = download_s3(key=key, recursive=True, **kwargs)
+        if codec is not None:
+            path = os.path.join(path, os.path.basename(key))
+            with open(path, "rb") as f:
+                with open_tar(f, codec) as tf:
+                    extract_tar(tf, os.path.dirname(path))
             os.remove(path)
             path = os.path.dirname(path)
-
-            # if the artifact contains only one directory, merge the
-            # directory with the target directory
-            ld = os.listdir(tmpdir)
-            if len(ld) == 1 and os.path.isdir(os.path.join(tmpdir, ld[0])):
-                merge_dir(os.path.join(tmpdir, ld[0]), path)
-            else:
-                merge_dir(tmpdir, path)
+        elif extract:
+            # e.g. wrapped archives merged by copy_artifact
+            extract_archive(path)
 
     remove_empty_dir_tag(path)
     return assemble_path_list(path, remove=True)
 
 
+def get_wrapped_archive(key, **kwargs):
+    """
+    Key and codec of the archive of an artifact uploaded by upload_artifact
+    with a codec Argo does not extract, None for other artifacts
+    """
+    client = get_storage_client(**kwargs)
+    key = key.rstrip("/")
+    prefix = "%s/%s/" % (key, config["catalog_dir_name"])
+    catalogs = client.list(prefix=prefix)
+    # a wrapped archive has a single catalog, named as the archive
+    if len(catalogs) != 1:
+        return None
+    name = catalogs[0][len(prefix):]
+    objs = client.list(prefix="%s/%s." % (key, name))
+    if len(objs) != 1:
+        return None
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fpath = os.path.join(tmpdir, "catalog")
+        client.download(key=catalogs[0], path=fpath)
+        with open(fpath, "r") as f:
+            catalog = jsonpickle.loads(f.read())
+    if "archive" not in catalog or objs[0] != "%s/%s" % (
+            key, catalog["archive"]["name"]):
+        return None
+    return objs[0], get_codec(catalog["archive"]["codec"])
+
+
+def extract_archive(path):
+    """
+    Extract archives in a local artifact uploaded by upload_artifact with
+    codecs Argo does not extract, each recorded in the catalog beside it
+    """
+    catalog_dir = os.path.join(path, config["catalog_dir_name"])
+    if not os.path.isdir(catalog_dir):
+        return
+    names = os.listdir(path)
+    for f in os.listdir(catalog_dir):
+        # an archive is named after its catalog, skip parsing others
+        if not any(n.startswith(f + ".") for n in names):
+            continue
+        with open(os.path.join(catalog_dir, f), "r") as fd:
+            catalog = jsonpickle.loads(fd.read())
+        if "archive" not in catalog or \
+                catalog["archive"]["name"] not in names:
+            continue
+        info = catalog.pop("archive")
+        codec = get_codec(info["codec"])
+        # out of the way of files in the archive
+        archive = path + codec.suffix
+        os.rename(os.path.join(path, info["name"]), archive)
+        with open(archive, "rb") as fd:
+            with open_tar(fd, codec) as tf:
+                extract_tar(tf, path)
+        os.remove(archive)
+        # over the catalog of the same name in the archive, whose orders
+        # may have been shifted by copy_artifact
+        with open(os.path.join(catalog_dir, f), "w") as fd:
+            fd.write(jsonpickle.dumps(catalog))
+
+
+def get_archive_index_key(key):
+    # outside the artifact, see get_compacted_catalog_key
+    return get_compacted_catalog_key(key) + ".index"
+
+
+def upload_archive_index(key, path_list, top, members, **kwargs):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fpath = os.path.join(tmpdir, "index")
+        with open(fpath, "w") as f:
+            f.write(jsonpickle.dumps({"path_list": path_list, "top": top,
+                                      "members": members}))
+        get_storage_client(**kwargs).upload(key=get_archive_index_key(key),
+                                            path=fpath)
+
+
+def load_archive_index(key, **kwargs):
+    client = get_storage_client(**kwargs)
+    index_key = get_archive_index_key(key)
+    if index_key not in client.list(prefix=index_key):
+        return None
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fpath = os.path.join(tmpdir, "index")
+        client.download(key=index_key, path=fpath)
+        with open(fpath, "r") as f:
+            return jsonpickle.loads(f.read())
+
+
+def download_archive_items(
+        key: str,
+        codec,
+        sub_paths: List[str] = None,
+        slices: List[int] = None,
+        path: os.PathLike = None,
+        max_concurrency: int = None,
+        **kwargs,
+) -> List[str]:
+    """
+    Download sub paths or slices of a tarball artifact, by ranged reads of
+    the indexed members if possible, otherwise by extracting the whole
+    tarball
+    """
+    if path is None:
+        path = "."
+    client = get_storage_client(**kwargs)
+    index = None
+    if codec.indexable and hasattr(client, "download_range"):
+        index = load_archive_index(key, **kwargs)
+
+    if index is None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path_list = download_artifact(S3Artifact(key=key), path=tmpdir,
+                                          max_concurrency=max_concurrency,
+                                          **kwargs)
+            if slices is not None:
+                sub_paths = [os.path.relpath(path_list[i], tmpdir)
+                             for i in slices]
+            res = []
+            for sub_path in sub_paths:
+                target = os.path.join(path, sub_path)
+                os.makedirs(os.path.dirname(os.path.abspath(target)),
+                            exist_ok=True)
+                if os.path.isdir(target):
+                    merge_dir(os.path.join(tmpdir, sub_path), target)
+                else:
+                    shutil.move(os.path.join(tmpdir, sub_path), target)
+                res.append(target)
+        return res
+
+    if slices is not None:
+        path_list = convert_dflow_list(list(index["path_list"]))
+        sub_paths = [path_list[i] for i in slices]
+    tasks = []
+    for sub_path in sub_paths:
+        prefix = "%s/%s" % (index["top"], sub_path.strip("/"))
+        for name, member in index["members"].items():
+            if name != prefix and not name.startswith(prefix + "/"):
+                continue
+            target = os.path.join(path, name[len(index["top"]) + 1:])
+            if member is None:
+                os.makedirs(target, exist_ok=True)
+            else:
+                tasks.append((target, member[0], member[1]))
+
+    def download(target, offset, size):
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        if size == 0:
+            open(target, "wb").close()
+        else:
+            client.download_range(key=key, path=target, offset=offset,
+                                  length=size)
+
+    transfer_objects(download, tasks, max_concurrency)
+    return [os.path.join(path, sub_path) for sub_path in sub_paths]
+
+
+def extract_tar(tf, path):
+    os.makedirs(path, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tf.extractall(tmpdir)
+        # if the artifact contains only one directory, merge the
+        # directory with the target directory
+        ld = os.listdir(tmpdir)
+        if len(ld) == 1 and os.path.isdir(os.path.join(tmpdir, ld[0])):
+            merge_dir(os.path.join(tmpdir, ld[0]), path)
+        else:
+            merge_dir(tmpdir, path)
+
+
 def upload_artifact(
         path: Union[os.PathLike, List[os.PathLike], Set[os.PathLike]],
         archive: str = "default",
+        content_addressed: bool = None,
         **kwargs,
 ) -> S3Artifact:
     """
@@ -121,15 +343,28 @@ def upload_artifact(
 
     Args:
         path: local path
-        archive: compress format of the artifact, None for no compression
+        archive: compress format of the artifact, None for no compression,
+            default to config["upload_codec"], see it for supported formats
+        content_addressed: key the artifact by the digest of its content and
+            skip uploading if it already exists, default to
+            s3_config["content_addressed"]
         endpoint: endpoint for Minio
         access_key: access key for Minio
         secret_key: secret key for Minio
         secure: secure or not for Minio
         bucket_name: bucket name for Minio
+        max_concurrency: maximum number of objects uploaded concurrently
     """
     if archive == "default":
-        archive = config["archive_mode"]
+        archive = config["upload_codec"] if config["upload_codec"] is not \
+            None else config["archive_mode"]
+    codec = get_codec(archive) if archive is not None else None
+    # Argo only extracts gzip tarballs, archives of other codecs are uploaded
+    # into a directory with a catalog recording the codec, see
+    # extract_archive
+    wrapped = codec is not None and not codec.argo
+    if content_addressed is None:
+        content_addressed = s3_config["content_addressed"]
     if not isinstance(path, (list, set)):
         path = [path]
     cwd = os.getcwd()
@@ -157,10 +392,23 @@ def upload_artifact(
             path_list.append({"dflow_list_item": relpath.replace("\\", "/"),
                               "order": i})
 
+        catalog = jsonpickle.dumps({"path_list": path_list})
+        key = None
+        if content_addressed and config["mode"] != "debug":
+            # name the catalog by the content so that identical uploads
+            # produce identical trees
+            digest = get_tree_digest(tmpdir, extra=catalog + str(archive))
+            catalog_name = digest
+            key = "%supload/sha256-%s/artifact" % (s3_config["prefix"],
+                                                   digest)
+            if codec is not None and not wrapped:
+                key += codec.suffix
+        else:
+            catalog_name = str(uuid.uuid4())
         catalog_dir = os.path.join(tmpdir, config["catalog_dir_name"])
         os.makedirs(catalog_dir, exist_ok=True)
-        with open(os.path.join(catalog_dir, str(uuid.uuid4())), "w") as f:
-            f.write(jsonpickle.dumps({"path_list": path_list}))
+        with open(os.path.join(catalog_dir, catalog_name), "w") as f:
+            f.write(catalog)
 
         if config["mode"] == "debug":
             os.makedirs("upload", exist_ok=True)
@@ -169,22 +417,236 @@ def upload_artifact(
             os.makedirs(tmpdir, exist_ok=True)
             return LocalArtifact(local_path=os.path.abspath(resdir))
 
-        if archive == "tar":
-            os.chdir(os.path.dirname(tmpdir))
-            tf = tarfile.open(os.path.basename(tmpdir) +
-                              ".tgz", "w:gz", dereference=True)
-            tf.add(os.path.basename(tmpdir))
-            tf.close()
-            os.chdir(cwd)
-            key = upload_s3(path=tmpdir + ".tgz", **kwargs)
-            os.remove(tmpdir + ".tgz")
+        if key is not None and artifact_exists(tmpdir, key, archive,
+                                               **kwargs):
+            logging.debug("upload artifact: %s exists, skip" % key)
+        elif codec is not None:
+            archive_key = key
+            if wrapped:
+                if key is None:
+                    key = get_upload_key(get_storage_client(**kwargs),
+                                         os.path.basename(tmpdir))
+                archive_key = "%s/%s%s" % (key, catalog_name, codec.suffix)
+            index = {} if codec.indexable else None
+            if s3_config["stream_archive"] and hasattr(
+                    get_storage_client(**kwargs), "upload_stream"):
+                archive_key = upload_tar_stream(
+                    path=tmpdir, archive=archive, key=archive_key,
+                    index=index, **kwargs)
+            else:
+                with open(tmpdir + codec.suffix, "wb") as f:
+                    write_tar(tmpdir, f, codec, index=index)
+                archive_key = upload_s3(path=tmpdir + codec.suffix,
+                                        key=archive_key, **kwargs)
+                os.remove(tmpdir + codec.suffix)
+            if index is not None:
+                # for ranged reads of slices
+                upload_archive_index(archive_key, path_list, os.path.basename(
+                    tmpdir), index, **kwargs)
+            if wrapped:
+                # uploaded after the archive, as its existence marks the
+                # artifact complete
+                with open(tmpdir + ".catalog", "w") as f:
+                    f.write(jsonpickle.dumps({
+                        "path_list": path_list, "archive": {
+                            "name": catalog_name + codec.suffix,
+                            "codec": archive}}))
+                get_storage_client(**kwargs).upload(
+                    key="%s/%s/%s" % (key, config["catalog_dir_name"],
+                                      catalog_name),
+                    path=tmpdir + ".catalog")
+                os.remove(tmpdir + ".catalog")
+            else:
+                key = archive_key
         else:
-            key = upload_s3(path=tmpdir, **kwargs)
+            key = upload_s3(path=tmpdir, key=key, **kwargs)
 
     logging.debug("upload artifact: finished")
     return S3Artifact(key=key, path_list=path_list)
 
 
+def get_stat_signature(paths):
+    """
+    Signature of local paths by the relative paths, sizes and mtimes of
+    files, cheaper than digests of the contents
+    """
+    signature = []
+    for p in sorted(os.path.abspath(p) for p in paths):
+        if os.path.isfile(p):
+            st = os.stat(p)
+            signature.append([p, st.st_size, st.st_mtime_ns])
+            continue
+        # renamed or moved directories are cataloged by their new paths
+        signature.append([p])
+        for dn, ds, fs in os.walk(p, followlinks=True):
+            ds.sort()
+            for f in sorted(fs):
+                st = os.stat(os.path.join(dn, f))
+                signature.append([os.path.relpath(os.path.join(dn, f), p),
+                                  st.st_size, st.st_mtime_ns])
+    return signature
+
+
+def upload_packages_artifact(
+        paths: Union[List[os.PathLike], Set[os.PathLike]],
+        **kwargs,
+) -> S3Artifact:
+    """
+    Upload python packages as a content addressed artifact, the key is
+    indexed by the signature of the local files in the compile cache so that
+    unchanged packages are neither archived nor digested again, the index is
+    validated by checking the existence of the object
+
+    Args:
+        paths: local paths of the packages
+    """
+    # sorted for identical catalogs of identical packages
+    paths = sorted(paths)
+    if config["mode"] == "debug":
+        return upload_artifact(paths, **kwargs)
+    fingerprint = get_fingerprint([
+        get_stat_signature(paths), os.getcwd(),
+        config["catalog_dir_name"], config["package_zip"]] + [
+            s3_config[k] for k in ["endpoint", "bucket_name", "repo_key",
+                                   "prefix"]])
+    entry = get_compile_cache("python_packages", fingerprint,
+                              persistent=True)
+    if entry is not None:
+        client = get_storage_client(**kwargs)
+        if client.list(prefix=entry["key"]):
+            return S3Artifact(key=entry["key"], path_list=entry["path_list"])
+    if config["package_zip"]:
+        # named by the fingerprint for identical catalogs of identical
+        # packages
+        zip_dir = os.path.join(tempfile.gettempdir(), "dflow-packages")
+        os.makedirs(zip_dir, exist_ok=True)
+        zip_path = os.path.join(zip_dir, "packages-%s.zip" % fingerprint[:16])
+        if not os.path.isfile(zip_path):
+            # built privately and renamed atomically, as concurrent drivers
+            # may build the same zip
+            tmpdir = tempfile.mkdtemp(dir=zip_dir)
+            try:
+                build_packages_zip(paths, os.path.join(tmpdir, "packages.zip"))
+                os.replace(os.path.join(tmpdir, "packages.zip"), zip_path)
+            finally:
+                shutil.rmtree(tmpdir, ignore_errors=True)
+        # the zip is imported in place, no need to archive it again
+        artifact = upload_artifact([zip_path], archive=None,
+                                   content_addressed=True, **kwargs)
+    else:
+        # extracted by Argo, as packages are needed before importing dflow
+        artifact = upload_artifact(paths, archive="tar",
+                                   content_addressed=True, **kwargs)
+    set_compile_cache("python_packages", fingerprint, {
+        "key": artifact.key, "path_list": artifact.path_list},
+        persistent=True)
+    return artifact
+
+
+def build_packages_zip(
+        paths: List[os.PathLike],
+        zip_path: os.PathLike,
+) -> None:
+    """
+    Build a zip of python packages importable through zipimport, each
+    package (or module) is placed at the root of the zip, bytecode compiled
+    by the local interpreter is placed next to the sources as unchecked
+    hash-based pycs, interpreters of other versions ignore them and compile
+    the sources instead
+
+    Args:
+        paths: local paths of packages or modules
+        zip_path: local path of the zip
+    """
+    entries = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cfile = os.path.join(tmpdir, "module.pyc")
+        for p in paths:
+            p = os.path.abspath(p)
+            base = os.path.dirname(p)
+            if os.path.isfile(p):
+                files = [p]
+            else:
+                files = []
+                for dn, ds, fs in os.walk(p, followlinks=True):
+                    ds[:] = sorted(d for d in ds if d != "__pycache__")
+                    files += [os.path.join(dn, f) for f in sorted(fs)
+                              if not f.endswith(".pyc")]
+            for f in files:
+                arcname = os.path.relpath(f, base).replace("\\", "/")
+                with open(f, "rb") as fd:
+                    entries[arcname] = fd.read()
+                # hash-based pycs are not supported before Python 3.7
+                if not f.endswith(".py") or not hasattr(
+                        py_compile, "PycInvalidationMode"):
+                    continue
+                try:
+                    py_compile.compile(
+                        f, cfile=cfile, dfile=arcname, doraise=True,
+                        invalidation_mode=py_compile.PycInvalidationMode.
+                        UNCHECKED_HASH)
+                except py_compile.PyCompileError:
+                    continue
+                with open(cfile, "rb") as fd:
+                    entries[arcname + "c"] = fd.read()
+
+    # fixed timestamps and order for identical zips of identical packages
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for arcname in sorted(entries):
+            info = zipfile.ZipInfo(arcname, date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            zf.writestr(info, entries[arcname])
+
+
+def get_tree_digest(path, extra=""):
+    """
+    SHA256 digest of the relative paths and contents of files in a
+    directory, symlinks are followed
+    """
+    sha256 = hashlib.sha256()
+    for dn, ds, fs in os.walk(path, followlinks=True):
+        ds.sort()
+        rel_dir = os.path.relpath(dn, path).replace("\\", "/")
+        sha256.update(("%s/\n" % rel_dir).encode())
+        for f in sorted(fs):
+            sha256.update(("%s/%s:%s\n" % (rel_dir, f, get_sha256(
+                os.path.join(dn, f)))).encode())
+    sha256.update(extra.encode())
+    return sha256.hexdigest()
+
+
+def get_sha256(f):
+    sha256 = hashlib.sha256()
+    with open(f, "rb") as fd:
+        for chunk in iter(lambda: fd.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def artifact_exists(path, key, archive=None, **kwargs):
+    """
+    Whether all objects of a local directory to be uploaded to the key exist
+    in the storage
+    """
+    client = get_storage_client(**kwargs)
+    if archive is not None and not get_codec(archive).argo:
+        # the catalog of a wrapped archive is uploaded last
+        return len(client.list(prefix="%s/%s/" % (
+            key, config["catalog_dir_name"]))) > 0
+    if archive is not None:
+        return key in client.list(prefix=key)
+    objs = set(client.list(prefix=key + "/", recursive=True))
+    for dn, ds, fs in os.walk(path, followlinks=True):
+        rel_path = os.path.relpath(dn, path).replace("\\", "/")
+        for f in fs:
+            obj = "%s/%s" % (key, f) if rel_path == "." else "%s/%s/%s" % (
+                key, rel_path, f)
+            if obj not in objs:
+                return False
+    return True
+
+
 def copy_artifact(src, dst, sort=False) -> S3Artifact:
     """
     Copy an artifact to another on server side
@@ -206,12 +668,20 @@ def copy_artifact(src, dst, sort=False) -> S3Artifact:
                          key=lambda item: item["order"])["order"] + 1
             for item in src_catalog:
                 item["order"] += offset
+            catalog = {"path_list": src_catalog}
+            catalog_name = str(uuid.uuid4())
+            wrapped = get_wrapped_archive(src_key)
+            if wrapped is not None:
+                # keep the archive recorded in the catalog named after it
+                name = os.path.basename(wrapped[0])
+                catalog["archive"] = {"name": name, "codec": wrapped[1].name}
+                catalog_name = name[:-len(wrapped[1].suffix)]
             with tempfile.TemporaryDirectory() as tmpdir:
                 catalog_dir = os.path.join(tmpdir, config["catalog_dir_name"])
                 os.makedirs(catalog_dir, exist_ok=True)
-                fpath = os.path.join(catalog_dir, str(uuid.uuid4()))
+                fpath = os.path.join(catalog_dir, catalog_name)
                 with open(fpath, "w") as f:
-                    f.write(jsonpickle.dumps({"path_list": src_catalog}))
+                    f.write(jsonpickle.dumps(catalog))
                 upload_s3(path=catalog_dir, prefix=dst_key)
                 ignore_catalog = True
 
@@ -222,7 +692,7 @@ def copy_artifact(src, dst, sort=False) -> S3Artifact:
 def get_md5(f):
     md5 = hashlib.md5()
     with open(f, "rb") as fd:
-        for chunk in iter(lambda: fd.read(4096), b""):
+        for chunk in iter(lambda: fd.read(1024 * 1024), b""):
             md5.update(chunk)
     return md5.hexdigest()
 
@@ -232,63 +702,224 @@ def download_s3(
         path: os.PathLike = None,
         recursive: bool = True,
         skip_exists: bool = False,
+        max_concurrency: int = None,
         **kwargs,
 ) -> str:
     if path is None:
         path = "."
-    if s3_config["storage_client"] is not None:
-        client = s3_config["storage_client"]
-    else:
-        client = MinioClient(**kwargs)
+    client = get_storage_client(**kwargs)
     if recursive:
-        for obj in client.list(prefix=key, recursive=True):
-            rel_path = obj[len(key):]
+        if skip_exists and hasattr(client, "list_info"):
+            infos = client.list_info(prefix=key, recursive=True)
+        else:
+            infos = [{"key": obj}
+                     for obj in client.list(prefix=key, recursive=True)]
+        tasks = []
+        for info in infos:
+            rel_path = info["key"][len(key):]
             if rel_path[:1] == "/":
                 rel_path = rel_path[1:]
             if rel_path == "":
-                file_path = os.path.join(path, os.path.basename(key))
-            else:
-                file_path = os.path.join(path, rel_path)
+                rel_path = os.path.basename(key)
+            tasks.append((info["key"], info, rel_path))
+
+        manifest_path = get_sync_manifest_path(path, key)
+        manifest = load_sync_manifest(manifest_path) if skip_exists else {}
 
+        def download(obj, info, rel_path):
+            file_path = os.path.join(path, rel_path)
             if skip_exists and os.path.isfile(file_path):
-                remote_md5 = client.get_md5(key=obj)
-                local_md5 = get_md5(file_path)
-                if remote_md5 == local_md5:
+                if "etag" not in info:
+                    info["etag"] = client.get_md5(key=obj)
+                if is_synced(file_path, info, manifest.get(rel_path)):
                     logging.debug("skip object: %s" % obj)
-                    continue
+                    manifest[rel_path] = sync_entry(file_path, info)
+                    return
+            download_object(client, obj, file_path, info.get("etag"))
+            if skip_exists and info.get("etag"):
+                manifest[rel_path] = sync_entry(file_path, info)
 
-            client.download(key=obj, path=file_path)
+        try:
+            transfer_objects(download, tasks, max_concurrency)
+        finally:
+            if skip_exists:
+                os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+                with open(manifest_path, "w") as f:
+                    f.write(jsonpickle.dumps(manifest))
     else:
         path = os.path.join(path, os.path.basename(key))
-        client.download(key=key, path=path)
+        download_object(client, key, path)
+    if s3_config["cache_dir"] is not None:
+        evict_cache(s3_config["cache_dir"], s3_config["cache_size"])
     return path
 
 
-def upload_s3(
-        path: os.PathLike,
-        key: str = None,
-        prefix: str = None,
-        **kwargs,
-) -> str:
-    if s3_config["storage_client"] is not None:
-        client = s3_config["storage_client"]
+# manifests recording key, etag, size and mtime of files downloaded with
+# skip_exists, kept outside the download directories
+sync_manifest_dir = os.path.join(tempfile.gettempdir(), "dflow-sync")
+
+
+def get_sync_manifest_path(path, key):
+    return os.path.join(sync_manifest_dir, hashlib.sha256(
+        ("%s\n%s" % (os.path.abspath(path), key)).encode()).hexdigest())
+
+
+def load_sync_manifest(manifest_path):
+    if os.path.isfile(manifest_path):
+        try:
+            with open(manifest_path, "r") as f:
+                return jsonpickle.loads(f.read())
+        except Exception:
+            logging.warning("Failed to load sync manifest %s" %
+                            manifest_path)
+    return {}
+
+
+def sync_entry(file_path, info):
+    st = os.stat(file_path)
+    return {"key": info["key"], "etag": info["etag"], "size": st.st_size,
+            "mtime": st.st_mtime}
+
+
+def is_synced(file_path, info, entry=None):
+    """
+    Whether a local file has the same content as an object, compare the
+    manifest entry first and then MD5 for objects not uploaded by multipart
+    """
+    st = os.stat(file_path)
+    if info.get("size") is not None and info["size"] != st.st_size:
+        return False
+    if entry is not None and entry["key"] == info["key"] and \
+            entry["etag"] == info["etag"] and entry["size"] == st.st_size \
+            and entry["mtime"] == st.st_mtime:
+        return True
+    # etag of a multipart object is not the MD5 of its content
+    if not info["etag"] or "-" in info["etag"]:
+        return False
+    return get_md5(file_path) == info["etag"]
+
+
+def download_object(client, key, path, etag=None):
+    """
+    Download an object, through the local cache if s3_config["cache_dir"] is
+    set
+    """
+    cache_dir = s3_config["cache_dir"]
+    if cache_dir is None:
+        client.download(key=key, path=path)
+        return
+    if etag is None:
+        etag = client.get_md5(key=key)
+    cache_path = os.path.join(cache_dir, hashlib.sha256(
+        ("%s:%s" % (key, etag)).encode()).hexdigest())
+    if os.path.isfile(cache_path):
+        logging.debug("cache hit: %s" % key)
+        # refresh mtime for LRU
+        os.utime(cache_path)
     else:
-        client = MinioClient(**kwargs)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = "%s.%s.tmp" % (cache_path, uuid.uuid4())
+        try:
+            client.download(key=key, path=tmp_path)
+            os.replace(tmp_path, cache_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if os.path.lexists(path):
+        os.remove(path)
+    # not linked, the download may be modified in place
+    clone_file(cache_path, path)
+
+
+# ioctl request of Linux cloning a file by reflink
+FICLONE = 0x40049409
+
+
+def clone_file(src, dst):
+    """
+    Copy a file sharing its data blocks with the source by a reflink (e.g.
+    on btrfs or xfs), or by copy_file_range which may share blocks or copy
+    within the kernel, and copy the content on failure (e.g. cross-device
+    or not supported by the filesystem)
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            import fcntl
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return
+        except (ImportError, OSError):
+            pass
+        if hasattr(os, "copy_file_range"):
+            size = os.fstat(fsrc.fileno()).st_size
+            offset = 0
+            try:
+                while offset < size:
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(),
+                                           size - offset, offset, offset)
+                    if n == 0:
+                        break
+                    offset += n
+            except OSError:
+                pass
+            if offset == size:
+                return
+    shutil.copyfile(src, dst)
+
+
+def evict_cache(cache_dir, cache_size):
+    """
+    Remove least recently used objects until the size of the cache is not
+    larger than cache_size
+    """
+    entries = []
+    total = 0
+    for f in os.listdir(cache_dir):
+        if f.endswith(".tmp"):
+            continue
+        try:
+            st = os.stat(os.path.join(cache_dir, f))
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, f))
+        total += st.st_size
+    for mtime, size, f in sorted(entries):
+        if total <= cache_size:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, f))
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def get_upload_key(client, name, key=None, prefix=None):
     if key is not None:
-        pass
+        return key
     elif prefix is not None:
         if prefix[-1] != "/":
             prefix += "/"
         objs = client.list(prefix=prefix)
         if len(objs) == 1 and objs[0][-1] == "/":
             prefix = objs[0]
-        key = "%s%s" % (prefix, os.path.basename(path))
+        return "%s%s" % (prefix, name)
     else:
-        key = "%supload/%s/%s" % (s3_config["prefix"],
-                                  uuid.uuid4(), os.path.basename(path))
+        return "%supload/%s/%s" % (s3_config["prefix"], uuid.uuid4(), name)
+
+
+def upload_s3(
+        path: os.PathLike,
+        key: str = None,
+        prefix: str = None,
+        max_concurrency: int = None,
+        **kwargs,
+) -> str:
+    client = get_storage_client(**kwargs)
+    key = get_upload_key(client, os.path.basename(path), key, prefix)
     if os.path.isfile(path):
         client.upload(key=key, path=path)
     elif os.path.isdir(path):
+        tasks = []
         for dn, ds, fs in os.walk(path, followlinks=True):
             rel_path = dn[len(path):]
             if rel_path == "":
@@ -296,8 +927,70 @@ def upload_s3(
             elif rel_path[0] != "/":
                 rel_path = "/" + rel_path
             for f in fs:
-                client.upload(key="%s%s/%s" % (key, rel_path, f),
-                              path=os.path.join(dn, f))
+                tasks.append(("%s%s/%s" % (key, rel_path, f),
+                              os.path.join(dn, f)))
+        transfer_objects(lambda k, p: client.upload(key=k, path=p), tasks,
+                         max_concurrency)
+    return key
+
+
+def upload_tar_stream(
+        path: os.PathLike,
+        archive: str = "tar",
+        key: str = None,
+        prefix: str = None,
+        index: dict = None,
+        **kwargs,
+) -> str:
+    """
+    Archive a directory into a tarball and pipe it into a multipart upload
+    without staging the tarball on local disk
+
+    Args:
+        path: local directory, added as the top directory of the tarball
+        archive: compress format of the tarball
+        key: key of the tarball
+        prefix: prefix of the tarball key if key is not provided
+        index: dict to be filled with the offsets of members, see write_tar
+    """
+    client = get_storage_client(**kwargs)
+    codec = get_codec(archive)
+    key = get_upload_key(client, os.path.basename(path) + codec.suffix, key,
+                         prefix)
+    r, w = os.pipe()
+    reader = os.fdopen(r, "rb")
+    writer = os.fdopen(w, "wb")
+    errors = []
+
+    def write():
+        try:
+            write_tar(path, writer, codec, index=index)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    class Stream:
+        def read(self, size=-1):
+            data = reader.read(size)
+            # fail the upload rather than completing a truncated tarball
+            if not data and errors:
+                raise errors[0]
+            return data
+
+    t = threading.Thread(target=write, daemon=True)
+    t.start()
+    try:
+        client.upload_stream(key=key, stream=Stream())
+    finally:
+        # unblock the writer if the upload failed
+        reader.close()
+        t.join()
+    if errors:
+        raise errors[0]
     return key
 
 
@@ -306,12 +999,10 @@ def copy_s3(
         dst_key: str,
         recursive: bool = True,
         ignore_catalog: bool = False,
+        max_concurrency: int = None,
         **kwargs,
 ) -> None:
-    if s3_config["storage_client"] is not None:
-        client = s3_config["storage_client"]
-    else:
-        client = MinioClient(**kwargs)
+    client = get_storage_client(**kwargs)
     if recursive:
         if src_key[-1] != "/":
             src_key += "/"
@@ -323,40 +1014,143 @@ def copy_s3(
         dst_objs = client.list(prefix=dst_key)
         if len(dst_objs) == 1 and dst_objs[0][-1] == "/":
             dst_key = dst_objs[0]
+        tasks = []
         for obj in client.list(prefix=src_key, recursive=True):
             if ignore_catalog:
                 fields = obj.split("/")
                 if len(fields) > 1 and fields[-2] == \
                         config["catalog_dir_name"]:
                     continue
-            client.copy(obj, dst_key + obj[len(src_key):])
+            tasks.append((obj, dst_key + obj[len(src_key):]))
+        transfer_objects(client.copy, tasks, max_concurrency)
     else:
         client.copy(src_key, dst_key)
 
 
+class TransferError(RuntimeError):
+    """
+    Raised when some objects in a batch transfer failed
+
+    Args:
+        errors: a dict mapping the key of each failed object to its exception
+    """
+
+    def __init__(self, errors: dict) -> None:
+        self.errors = errors
+        msg = "\n".join("%s: %s" % (k, e) for k, e in errors.items())
+        super().__init__("%s objects failed to transfer:\n%s" % (
+            len(errors), msg))
+
+
+def transfer_objects(
+        func: Callable,
+        tasks: List[tuple],
+        max_concurrency: int = None,
+) -> None:
+    """
+    Transfer objects concurrently with a bounded thread pool
+
+    Args:
+        func: function to transfer one object, called as func(*task)
+        tasks: list of argument tuples, the first of which identifies the
+            object
+        max_concurrency: maximum number of concurrent transfers, default to
+            s3_config["max_concurrency"]
+    """
+    if max_concurrency is None:
+        max_concurrency = s3_config["max_concurrency"]
+    errors = {}
+    if max_concurrency is None or max_concurrency <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            try:
+                func(*task)
+            except Exception as e:
+                errors[task[0]] = e
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_concurrency,
+                                                len(tasks))) as executor:
+            futures = [(task[0], executor.submit(func, *task))
+                       for task in tasks]
+            for obj, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[obj] = e
+    for obj, e in errors.items():
+        logging.debug("transfer object %s failed: %s" % (obj, e))
+    if errors:
+        raise TransferError(errors)
+
+
+def get_compacted_catalog_key(key):
+    # outside the artifact, as pods read all files in its catalog directory
+    return "%s%s/%s" % (s3_config["prefix"], config["catalog_dir_name"],
+                        key.rstrip("/"))
+
+
 def catalog_of_artifact(art, **kwargs) -> List[dict]:
+    """
+    Catalog of an artifact, the per-slice catalog files are merged into a
+    compacted catalog object on the first read if s3_config[
+    "compact_catalog"] is set, and parsed catalogs are cached in memory
+    """
     key = get_key(art, raise_error=False)
     if not key:
         return []
     if key[-1] != "/":
         key += "/"
 
-    if s3_config["storage_client"] is not None:
-        client = s3_config["storage_client"]
-    else:
-        client = MinioClient(**kwargs)
-    catalog = []
+    client = get_storage_client(**kwargs)
+    objs = client.list(prefix=key)
+    if len(objs) == 1 and objs[0][-1] == "/":
+        key = objs[0]
+    prefix = key + config["catalog_dir_name"] + "/"
+    names = sorted(obj[len(prefix):] for obj in client.list(prefix=prefix))
+    cached = catalog_cache.get(key)
+    if cached is not None and cached["catalogs"] == names:
+        return copy.deepcopy(cached["path_list"])
+
+    compacted_key = get_compacted_catalog_key(key)
+    compacted = None
     with tempfile.TemporaryDirectory() as tmpdir:
-        objs = client.list(prefix=key)
-        if len(objs) == 1 and objs[0][-1] == "/":
-            key = objs[0]
-        prefix = key + config["catalog_dir_name"] + "/"
-        for obj in client.list(prefix=prefix):
-            fname = obj[len(prefix):]
-            client.download(key=obj, path=os.path.join(tmpdir, fname))
-            with open(os.path.join(tmpdir, fname), "r") as f:
-                catalog += jsonpickle.loads(f.read())['path_list']
-    return catalog
+        if len(names) > 1 and s3_config["compact_catalog"] and \
+                compacted_key in client.list(prefix=compacted_key):
+            client.download(key=compacted_key,
+                            path=os.path.join(tmpdir, "compacted"))
+            with open(os.path.join(tmpdir, "compacted"), "r") as f:
+                compacted = jsonpickle.loads(f.read())
+            if compacted.get("catalogs") != names:
+                compacted = None
+
+        if compacted is None:
+            catalogs = {}
+
+            def load(name):
+                fpath = os.path.join(tmpdir, name)
+                client.download(key=prefix + name, path=fpath)
+                with open(fpath, "r") as f:
+                    catalogs[name] = jsonpickle.loads(f.read())['path_list']
+
+            transfer_objects(load, [(name,) for name in names],
+                             kwargs.get("max_concurrency"))
+            catalog = []
+            for name in names:
+                catalog += catalogs[name]
+            compacted = {"catalogs": names, "path_list": sorted(
+                catalog, key=lambda item: item["order"])}
+            if len(names) > 1 and s3_config["compact_catalog"]:
+                fpath = os.path.join(tmpdir, "compacted")
+                with open(fpath, "w") as f:
+                    f.write(jsonpickle.dumps(compacted))
+                try:
+                    client.upload(key=compacted_key, path=fpath)
+                except Exception as e:
+                    logging.warning("Failed to compact catalog of %s: %s"
+                                    % (key, e))
+
+    with catalog_cache_lock:
+        catalog_cache[key] = compacted
+    return copy.deepcopy(compacted["path_list"])
 
 
 def path_list_of_artifact(art, **kwargs) -> List[str]:
@@ -405,23 +1199,56 @@ def assemble_path_list(art_path, remove=False):
         dflow_list = []
         catalog_dir = os.path.join(art_path, config["catalog_dir_name"])
         if os.path.exists(catalog_dir):
-            for f in os.listdir(catalog_dir):
-                with open(os.path.join(catalog_dir, f), 'r') as fd:
-                    for item in jsonpickle.loads(fd.read())['path_list']:
-                        if item not in dflow_list:
-                            dflow_list.append(item)  # remove duplicate
+            dflow_list = load_catalog_dir(catalog_dir)
             if remove:
                 shutil.rmtree(catalog_dir)
         if len(dflow_list) > 0:
-            path_list = list(map(lambda x: os.path.join(
-                art_path, x) if x is not None else None,
-                convert_dflow_list(dflow_list)))
+            path_list = [os.path.join(art_path, x) if x is not None else None
+                         for x in convert_dflow_list(dflow_list)]
     return path_list
 
 
+# parsed catalog directories, see load_catalog_dir
+catalog_dir_cache = {}
+
+
+def load_catalog_dir(catalog_dir):
+    """
+    Merge the catalog files in a local catalog directory with duplicates
+    removed, parsed results are cached by the names, sizes and mtimes of
+    the catalog files
+    """
+    stats = []
+    for f in sorted(os.listdir(catalog_dir)):
+        st = os.stat(os.path.join(catalog_dir, f))
+        stats.append((f, st.st_size, st.st_mtime_ns))
+    cache_key = (os.path.abspath(catalog_dir), tuple(stats))
+    if cache_key in catalog_dir_cache:
+        return list(catalog_dir_cache[cache_key])
+
+    dflow_list = []
+    seen = set()
+    for f, _, _ in stats:
+        with open(os.path.join(catalog_dir, f), 'r') as fd:
+            for item in jsonpickle.loads(fd.read())['path_list']:
+                if len(item) == 2 and isinstance(
+                        item.get("dflow_list_item"), (str, type(None))):
+                    key = (item["dflow_list_item"], item.get("order"))
+                else:
+                    key = json.dumps(item, sort_keys=True, default=str)
+                if key not in seen:  # remove duplicate
+                    seen.add(key)
+                    dflow_list.append(item)
+    dflow_list.sort(key=lambda x: x['order'])
+    if len(catalog_dir_cache) >= 16:
+        catalog_dir_cache.clear()
+    catalog_dir_cache[cache_key] = dflow_list
+    return list(dflow_list)
+
+
 def convert_dflow_list(dflow_list):
     dflow_list.sort(key=lambda x: x['order'])
-    return list(map(lambda x: x['dflow_list_item'], dflow_list))
+    return [x['dflow_list_item'] for x in dflow_list]
 
 
 def remove_empty_dir_tag(path):
@@ -557,6 +1384,34 @@ def force_link(src, dst, func=os.symlink):
     func(src, dst)
 
 
+def get_storage_client(**kwargs) -> "StorageClient":
+    """
+    Get the storage client, the plugin storage client if it is set, otherwise
+    a Minio client shared within the process
+
+    Minio clients are cached by endpoint, credentials and bucket so that their
+    keep-alive connection pools are reused across calls
+
+    Args:
+        endpoint: endpoint for Minio
+        access_key: access key for Minio
+        secret_key: secret key for Minio
+        secure: secure or not for Minio
+        bucket_name: bucket name for Minio
+    """
+    if s3_config["storage_client"] is not None:
+        return s3_config["storage_client"]
+    kwargs = {k: kwargs.get(k) if kwargs.get(k) is not None else s3_config[k]
+              for k in ["endpoint", "access_key", "secret_key", "secure",
+                        "bucket_name"]}
+    # connection pools must not be shared with forked processes
+    key = (os.getpid(), ) + tuple(kwargs.values())
+    with storage_clients_lock:
+        if key not in storage_clients:
+            storage_clients[key] = MinioClient(**kwargs)
+        return storage_clients[key]
+
+
 class StorageClient:
     def upload(self, key: str, path: str) -> None:
         pass
@@ -583,6 +1438,19 @@ class MinioClient(StorageClient):
                  bucket_name: str = None,
                  **kwargs,
                  ) -> None:
+        pool_size = s3_config["pool_size"]
+        if pool_size is None:
+            pool_size = max(10, s3_config["max_concurrency"] or 1)
+        timeout = 300
+        http_client = urllib3.PoolManager(
+            timeout=urllib3.Timeout(connect=timeout, read=timeout),
+            maxsize=pool_size,
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+            retries=urllib3.Retry(
+                total=5, backoff_factor=0.2,
+                status_forcelist=[500, 502, 503, 504]),
+        )
         self.client = Minio(
             endpoint=endpoint if endpoint is not None else
             s3_config["endpoint"],
@@ -591,6 +1459,7 @@ class MinioClient(StorageClient):
             secret_key=secret_key if secret_key is not None else
             s3_config["secret_key"],
             secure=secure if secure is not None else s3_config["secure"],
+            http_client=http_client,
         )
         self.bucket_name = bucket_name if bucket_name is not None else \
             s3_config["bucket_name"]
@@ -603,10 +1472,44 @@ class MinioClient(StorageClient):
         self.client.fget_object(bucket_name=self.bucket_name,
                                 object_name=key, file_path=path)
 
+    def upload_stream(self, key: str, stream) -> None:
+        self.client.put_object(bucket_name=self.bucket_name, object_name=key,
+                               data=stream, length=-1,
+                               part_size=s3_config["part_size"])
+
+    @contextlib.contextmanager
+    def download_stream(self, key: str):
+        response = self.client.get_object(bucket_name=self.bucket_name,
+                                          object_name=key)
+        try:
+            yield response
+        finally:
+            response.close()
+            response.release_conn()
+
+    def download_range(self, key: str, path: str, offset: int,
+                       length: int) -> None:
+        response = self.client.get_object(bucket_name=self.bucket_name,
+                                          object_name=key, offset=offset,
+                                          length=length)
+        try:
+            with open(path, "wb") as f:
+                for data in response.stream(1024 * 1024):
+                    f.write(data)
+        finally:
+            response.close()
+            response.release_conn()
+
     def list(self, prefix: str, recursive: bool = False) -> List[str]:
         return [obj.object_name for obj in self.client.list_objects(
             bucket_name=self.bucket_name, prefix=prefix, recursive=recursive)]
 
+    def list_info(self, prefix: str, recursive: bool = False) -> List[dict]:
+        return [{"key": obj.object_name, "etag": (obj.etag or "").strip('"'),
+                 "size": obj.size} for obj in self.client.list_objects(
+                     bucket_name=self.bucket_name, prefix=prefix,
+                     recursive=recursive)]
+
     def copy(self, src: str, dst: str) -> None:
         self.client.copy_object(self.bucket_name, dst,
                                 CopySource(self.bucket_name, src))
@@ -614,3 +1517,83 @@ class MinioClient(StorageClient):
     def get_md5(self, key: str) -> str:
         return self.client.stat_object(bucket_name=self.bucket_name,
                                        object_name=key).etag
+
+
+def get_fingerprint(obj) -> Optional[str]:
+    """
+    Structural fingerprint of an object by its serialization, None if the
+    object cannot be serialized
+    """
+    try:
+        return hashlib.sha256(jsonpickle.dumps(obj).encode()).hexdigest()
+    except Exception:
+        return None
+
+
+def get_compile_cache_path(kind, fingerprint):
+    return os.path.join(config["compile_cache_dir"], kind,
+                        fingerprint + ".json")
+
+
+def get_compile_cache(kind: str, fingerprint: str, persistent: bool = False):
+    """
+    Get a result of compiling workflows from the compile cache
+
+    Args:
+        kind: kind of the result
+        fingerprint: fingerprint of the input
+        persistent: also look up config["compile_cache_dir"] on disk
+    Returns:
+        the cached result, None if not found
+    """
+    if not config["compile_cache"] or fingerprint is None:
+        return None
+    with compile_cache_lock:
+        if (kind, fingerprint) in compile_cache:
+            return compile_cache[(kind, fingerprint)]
+    if persistent and config["compile_cache_dir"] is not None:
+        path = get_compile_cache_path(kind, fingerprint)
+        if os.path.isfile(path):
+            try:
+                with open(path, "r") as f:
+                    value = json.load(f)
+                with compile_cache_lock:
+                    compile_cache[(kind, fingerprint)] = value
+                return value
+            except Exception:
+                logging.warning("Failed to load compile cache %s" % path)
+    return None
+
+
+def set_compile_cache(kind: str, fingerprint: str, value,
+                      persistent: bool = False) -> None:
+    """
+    Put a result of compiling workflows into the compile cache
+
+    Args:
+        kind: kind of the result
+        fingerprint: fingerprint of the input
+        value: the result, JSON serializable if persistent
+        persistent: also save to config["compile_cache_dir"] on disk
+    """
+    if not config["compile_cache"] or fingerprint is None:
+        return
+    with compile_cache_lock:
+        compile_cache[(kind, fingerprint)] = value
+    if persistent and config["compile_cache_dir"] is not None:
+        path = get_compile_cache_path(kind, fingerprint)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = "%s.%s" % (path, randstr())
+        with open(tmp_path, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+
+def clear_compile_cache() -> None:
+    """
+    Clear the compile cache in memory and on disk
+    """
+    with compile_cache_lock:
+        compile_cache.clear()
+    if config["compile_cache_dir"] is not None:
+        shutil.rmtree(config["compile_cache_dir"], ignore_errors=True)
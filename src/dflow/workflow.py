@@ -1,7 +1,13 @@
+import hashlib
 import json
 import logging
 import os
-from typing import Dict, List, Union
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Generator, Iterator, List, Optional, Union
 
 import jsonpickle
 
@@ -118,16 +124,8 @@ class Workflow:
         self.artifact_repo_key = artifact_repo_key if artifact_repo_key is \
             not None else s3_config["repo_key"]
 
-        configuration = Configuration(host=self.host)
-        configuration.verify_ssl = False
-        if self.token is None:
-            api_client = ApiClient(configuration)
-        else:
-            api_client = ApiClient(
-                configuration, header_name='Authorization',
-                header_value='Bearer %s' % self.token)
-
-        self.api_instance = WorkflowServiceApi(api_client)
+        self.api_instance = WorkflowServiceApi(get_argo_api_client(
+            self.host, self.token))
 
         self.namespace = namespace if namespace is not None else \
             config["namespace"]
@@ -167,22 +165,8 @@ class Workflow:
                     s3_config["repo_prefix"] = s3["keyFormat"][:-len(t)]
 
     def get_k8s_core_v1_api(self):
-        if self.k8s_api_server is not None:
-            k8s_configuration = kubernetes.client.Configuration(
-                host=self.k8s_api_server)
-            k8s_configuration.verify_ssl = False
-            if self.token is None:
-                k8s_client = kubernetes.client.ApiClient(
-                    k8s_configuration)
-            else:
-                k8s_client = kubernetes.client.ApiClient(
-                    k8s_configuration, header_name='Authorization',
-                    header_value='Bearer %s' % self.token)
-            return kubernetes.client.CoreV1Api(k8s_client)
-        else:
-            kubernetes.config.load_kube_config(
-                config_file=self.k8s_config_file)
-            return kubernetes.client.CoreV1Api()
+        return kubernetes.client.CoreV1Api(get_k8s_api_client(
+            self.k8s_api_server, self.token, self.k8s_config_file))
 
     def __enter__(self) -> 'Workflow':
         GLOBAL_CONTEXT.in_context = True
@@ -328,8 +312,8 @@ class Workflow:
             self.id = self.name + "-" + randstr()
             copied_keys = []
             reused_keys = []
+            entries = {}
             for step in reuse_step:
-                data = {}
                 if step.key is None:
                     continue
                 reused_keys.append(step.key)
@@ -367,25 +351,31 @@ class Workflow:
                         outputs["artifacts"] = [
                             art.recover()
                             for art in step.outputs.artifacts.values()]
-                data["%s-%s" % (self.id, step.key)] = json.dumps({
+                entries[step.key] = json.dumps({
                     "nodeID": step.id,
                     "outputs": outputs,
                     "creationTimestamp": step.finishedAt,
                     "lastHitTimestamp": step.finishedAt
                 })
-                config_map = kubernetes.client.V1ConfigMap(
-                    data=data, metadata=kubernetes.client.V1ObjectMeta(
-                        name="dflow-%s-%s" % (self.id, step.key)))
-                core_v1_api = self.get_k8s_core_v1_api()
-                core_v1_api.create_namespaced_config_map(
-                    namespace=self.namespace, body=config_map)
+            # pack entries into a few config maps instead of one per step
+            length, shards = pack_memoize_entries(
+                entries, count_keyed_steps(self.entrypoint))
+            self.create_config_maps({
+                "dflow-%s-%s" % (self.id, shard): {
+                    "%s-%s" % (self.id, key): value
+                    for key, value in shard_entries.items()}
+                for shard, shard_entries in shards.items()})
             self.handle_template(
                 self.entrypoint, memoize_prefix=self.id,
-                memoize_configmap="dflow")
+                memoize_configmap="dflow-%s-{{=sprig.substr(0, %s, "
+                "sprig.sha256sum(inputs.parameters.dflow_key))}}" % (
+                    self.id, length))
             status = {"outputs": {"parameters": [{"name": key} for key in
                                                  reused_keys]}}
         else:
             self.handle_template(self.entrypoint)
+        if config["dedup_templates"]:
+            self.deduplicate_templates()
 
         argo_pvcs = []
         for pvc in self.pvcs.values():
@@ -437,6 +427,73 @@ class Workflow:
             ),
             status=status)
 
+    def create_config_maps(self, config_maps: Dict[str, dict]) -> None:
+        """
+        Create config maps concurrently
+
+        Args:
+            config_maps: a dict from name to data of config maps
+        """
+        if not config_maps:
+            return
+        core_v1_api = self.get_k8s_core_v1_api()
+
+        def create(name):
+            core_v1_api.create_namespaced_config_map(
+                namespace=self.namespace, body=kubernetes.client.V1ConfigMap(
+                    data=config_maps[name],
+                    metadata=kubernetes.client.V1ObjectMeta(name=name)))
+
+        with ThreadPoolExecutor(max_workers=min(
+                config["k8s_max_concurrency"], len(config_maps))) as executor:
+            list(executor.map(create, config_maps))
+
+    def deduplicate_templates(self) -> None:
+        """
+        Collapse Argo templates identical except for their names into one,
+        references from steps and DAG tasks are redirected to the kept one
+        """
+        sanitize = self.api_instance.api_client.sanitize_for_serialization
+
+        def digest(template):
+            body = sanitize(template)
+            body.pop("name", None)
+            return hashlib.sha256(json.dumps(
+                body, sort_keys=True).encode()).hexdigest()
+
+        def references(template):
+            if template.steps is not None:
+                for parallel_steps in template.steps:
+                    yield from parallel_steps
+            if template.dag is not None:
+                yield from template.dag.tasks
+
+        digests = {name: digest(template)
+                   for name, template in self.argo_templates.items()}
+        # collapsing templates may make templates referring to them identical
+        while True:
+            kept = {}
+            alias = {}
+            # the entrypoint comes first and is always kept
+            for name, d in digests.items():
+                if d in kept:
+                    alias[name] = kept[d]
+                else:
+                    kept[d] = name
+            if not alias:
+                return
+            for name in alias:
+                del self.argo_templates[name]
+                del digests[name]
+            for name, template in self.argo_templates.items():
+                changed = False
+                for step in references(template):
+                    if step.template in alias:
+                        step.template = alias[step.template]
+                        changed = True
+                if changed:
+                    digests[name] = digest(template)
+
     def handle_template(self, template, memoize_prefix=None,
                         memoize_configmap="dflow"):
         if template.name in self.templates:
@@ -463,23 +520,86 @@ class Workflow:
 
     def query(
             self,
+            fields: List[str] = None,
     ) -> ArgoWorkflow:
         """
         Query the workflow from Argo
 
+        Args:
+            fields: fields to be included in the response, e.g.
+                ["status.phase"], None for the whole workflow
         Returns:
             an ArgoWorkflow object
         """
+        return ArgoWorkflow(self.run_requests(self.query_requests(fields)))
+
+    def query_requests(
+            self,
+            fields: List[str] = None,
+    ) -> Generator[tuple, dict, dict]:
+        """
+        Requests for querying the workflow through the query cache, shared by
+        the synchronous and asynchronous clients, a generator yielding the
+        path and query parameters of GET requests to Argo and receiving
+        their responses (or exceptions thrown in), returning the response of
+        the workflow
+
+        Args:
+            fields: fields to be included in the response, None for the whole
+                workflow
+        """
+        path = '/api/v1/workflows/%s/%s' % (self.namespace, self.id)
+        cache_key = (self.host, self.namespace, self.id, self.uid,
+                     None if fields is None else tuple(fields))
+        if config["query_cache"]:
+            entry = get_query_cache(cache_key)
+            if entry is not None and not entry["completed"]:
+                # the workflow is unchanged if so is its resource version
+                try:
+                    response = yield path, [
+                        ('fields', 'metadata.resourceVersion')]
+                    if response["metadata"]["resourceVersion"] != \
+                            entry["resourceVersion"]:
+                        entry = None
+                except Exception:
+                    entry = None
+            if entry is not None:
+                return entry["response"]
+            fields = fields_for_query_cache(fields)
+
+        query_params = []
+        if fields is not None:
+            query_params.append(('fields', ','.join(fields)))
+        archived = False
         try:
-            response = self.api_instance.api_client.call_api(
-                '/api/v1/workflows/%s/%s' % (self.namespace, self.id),
-                'GET', response_type=object, _return_http_data_only=True)
+            response = yield path, query_params
         except Exception:
-            response = self.api_instance.api_client.call_api(
-                '/api/v1/archived-workflows/%s' % self.uid,
-                'GET', response_type=object, _return_http_data_only=True)
-        workflow = ArgoWorkflow(response)
-        return workflow
+            response = yield '/api/v1/archived-workflows/%s' % self.uid, \
+                query_params
+            archived = True
+        if config["query_cache"]:
+            set_query_cache(cache_key, query_cache_entry(response, archived))
+        return response
+
+    def run_requests(self, requests: Generator[tuple, dict, dict]):
+        """
+        Send GET requests yielded by a generator (e.g. query_requests) to
+        Argo, return the result of the generator
+        """
+        try:
+            path, query_params = next(requests)
+            while True:
+                try:
+                    response = self.api_instance.api_client.call_api(
+                        path, 'GET', response_type=object,
+                        _return_http_data_only=True,
+                        query_params=query_params)
+                except Exception as e:
+                    path, query_params = requests.throw(e)
+                else:
+                    path, query_params = requests.send(response)
+        except StopIteration as e:
+            return e.value
 
     def query_status(
             self,
@@ -493,12 +613,52 @@ class Workflow:
         if config["mode"] == "debug":
             with open("%s/status" % self.id, "r") as f:
                 return f.read()
-        workflow = self.query()
-        if "phase" not in workflow.status:
+        workflow = self.query(fields=["status.phase"])
+        if "status" not in workflow or "phase" not in workflow.status:
             return "Pending"
         else:
             return workflow.status.phase
 
+    def watch(
+            self,
+            retries: int = 5,
+    ) -> Iterator[ArgoStep]:
+        """
+        Watch the workflow through the event stream of Argo, yield steps
+        whose phase changed until the workflow finishes, reconnect from the
+        last seen resource version on disconnection
+
+        Args:
+            retries: maximum number of successive reconnections
+        Returns:
+            a generator of steps with new phases
+        """
+        if config["mode"] == "debug":
+            phases = {}
+            while True:
+                for step in self.query_step():
+                    if phases.get(step.key) != step.phase:
+                        phases[step.key] = step.phase
+                        yield step
+                if self.query_status() in ["Succeeded", "Failed", "Error"]:
+                    return
+                time.sleep(1)
+
+        state = WatchState(self.id)
+        while True:
+            try:
+                response = self.api_instance.api_client.call_api(
+                    '/api/v1/workflow-events/%s' % self.namespace, 'GET',
+                    query_params=state.query_params(), _preload_content=False,
+                    _return_http_data_only=True)
+                for event in iter_json_lines(response):
+                    yield from state.handle_event(event)
+                    if state.finished:
+                        return
+                raise RuntimeError("Event stream closed")
+            except Exception as e:
+                time.sleep(state.handle_error(e, retries))
+
     def query_step(
             self,
             name: Union[str, List[str]] = None,
@@ -592,8 +752,27 @@ class Workflow:
                 step_list.append(step)
             return step_list
 
-        return self.query().get_step(name=name, key=key, phase=phase, id=id,
-                                     type=type)
+        return self.query(fields=["status.nodes"]).get_step(
+            name=name, key=key, phase=phase, id=id, type=type)
+
+    def query_step_by_keys(
+            self,
+            keys: List[str],
+    ) -> Dict[str, List[ArgoStep]]:
+        """
+        Query the existing steps of multiple keys with one query
+
+        Args:
+            keys: keys of steps
+        Returns:
+            a dict from key to the list of steps with the key
+        """
+        if config["mode"] == "debug":
+            steps = {key: [] for key in keys}
+            for step in self.query_step(key=keys):
+                steps[step.key].append(step)
+            return steps
+        return self.query(fields=["status.nodes"]).get_step_by_keys(keys)
 
     def query_keys_of_steps(
             self,
@@ -639,6 +818,7 @@ class Workflow:
         """
         if self.id is None:
             raise RuntimeError("Workflow ID is None")
+        invalidate_query_cache(self.id)
         self.api_instance.api_client.call_api(
             '/api/v1/workflows/%s/%s' % (self.namespace, self.id), 'DELETE')
 
@@ -658,6 +838,7 @@ class Workflow:
         """
         if self.id is None:
             raise RuntimeError("Workflow ID is None")
+        invalidate_query_cache(self.id)
         self.api_instance.api_client.call_api(
             '/api/v1/workflows/%s/%s/resume' % (self.namespace, self.id),
             'PUT')
@@ -668,6 +849,7 @@ class Workflow:
         """
         if self.id is None:
             raise RuntimeError("Workflow ID is None")
+        invalidate_query_cache(self.id)
         self.api_instance.api_client.call_api(
             '/api/v1/workflows/%s/%s/retry' % (self.namespace, self.id),
             'PUT')
@@ -691,3 +873,399 @@ class Workflow:
         self.api_instance.api_client.call_api(
             '/api/v1/workflows/%s/%s/suspend' % (self.namespace, self.id),
             'PUT')
+
+
+# process-wide API clients, see get_argo_api_client and get_k8s_api_client
+api_clients = {}
+api_clients_lock = threading.Lock()
+
+
+def get_argo_api_client(host, token=None):
+    """
+    Get the Argo API client shared within the process by host and token, so
+    that its connection pool is reused across workflows
+    """
+    # connection pools must not be shared with forked processes
+    key = (os.getpid(), "argo", host, token)
+    with api_clients_lock:
+        if key not in api_clients:
+            configuration = Configuration(host=host)
+            configuration.verify_ssl = False
+            if token is None:
+                api_clients[key] = ApiClient(configuration)
+            else:
+                api_clients[key] = ApiClient(
+                    configuration, header_name='Authorization',
+                    header_value='Bearer %s' % token)
+        return api_clients[key]
+
+
+def get_k8s_api_client(api_server=None, token=None, config_file=None):
+    """
+    Get the Kubernetes API client shared within the process by API server,
+    token and kube config file, so that the kube config is parsed once
+    """
+    key = (os.getpid(), "k8s", api_server, token,
+           None if api_server is not None else config_file)
+    with api_clients_lock:
+        if key not in api_clients:
+            if api_server is not None:
+                k8s_configuration = kubernetes.client.Configuration(
+                    host=api_server)
+                k8s_configuration.verify_ssl = False
+                if token is None:
+                    api_clients[key] = kubernetes.client.ApiClient(
+                        k8s_configuration)
+                else:
+                    api_clients[key] = kubernetes.client.ApiClient(
+                        k8s_configuration, header_name='Authorization',
+                        header_value='Bearer %s' % token)
+            else:
+                api_clients[key] = kubernetes.config.new_client_from_config(
+                    config_file=config_file)
+        return api_clients[key]
+
+
+def get_memoize_shard(key: str, length: int) -> str:
+    """
+    Shard of a memoization entry, consistent with the config map name
+    template evaluated by Argo
+    """
+    return hashlib.sha256(key.encode()).hexdigest()[:length]
+
+
+def count_keyed_steps(template, visited=None) -> int:
+    """
+    Estimate the number of memoization entries produced by keyed steps in a
+    steps or DAG template and the templates it uses, each iteration of a
+    loop over a literal list or count is counted, loops of unknown length
+    and recursions are counted once
+    """
+    if visited is None:
+        visited = set()
+    if id(template) in visited or not isinstance(template, (Steps, DAG)):
+        return 0
+    visited.add(id(template))
+    steps = []
+    for step in (template.steps if isinstance(template, Steps)
+                 else template.tasks):
+        steps += step if isinstance(step, list) else [step]
+    n = 0
+    for step in steps:
+        if step.key is not None:
+            if isinstance(step.with_param, (list, tuple)):
+                n += len(step.with_param)
+            elif step.with_sequence is not None and isinstance(
+                    step.with_sequence.count, int):
+                n += step.with_sequence.count
+            elif step.with_sequence is not None and isinstance(
+                    step.with_sequence.end, int):
+                n += step.with_sequence.end - (
+                    step.with_sequence.start if isinstance(
+                        step.with_sequence.start, int) else 0) + 1
+            else:
+                n += 1
+        n += count_keyed_steps(step.template, visited)
+    return n
+
+
+def pack_memoize_entries(entries, n_keys=0, size=None):
+    """
+    Pack memoization entries into shards by leading hex digits of the
+    SHA-256 of the step keys, using the fewest digits with which every shard
+    fits in size, both with the given entries and with the entries of all
+    keyed steps saved by Argo to the same shards during the workflow
+
+    Args:
+        entries: a dict from step key to memoization entry
+        n_keys: estimated number of memoization entries in the workflow
+        size: target size in bytes of a shard, default to
+            config["memoize_configmap_size"]
+    Returns:
+        the number of digits and a dict from shard to entries
+    """
+    if size is None:
+        size = config["memoize_configmap_size"]
+    total = sum(len(k) + len(v) for k, v in entries.items())
+    # assume 1 KiB for an entry when no step is reused
+    average = total / len(entries) if entries else 1024
+    expected = max(n_keys, len(entries)) * average
+    length = 1
+    while True:
+        shards = {}
+        sizes = {}
+        for k, v in entries.items():
+            shard = get_memoize_shard(k, length)
+            shards.setdefault(shard, {})[k] = v
+            sizes[shard] = sizes.get(shard, 0) + len(k) + len(v)
+        # leave a margin for uneven hashing of the expected entries
+        if length >= 4 or (all(s <= size for s in sizes.values()) and
+                           expected * 1.5 / 16 ** length <= size):
+            return length, shards
+        length += 1
+
+
+def query_workflows(
+        ids: List[str] = None,
+        label_selector: str = None,
+        namespace: str = None,
+        host: str = None,
+        token: str = None,
+        fields: List[str] = None,
+        limit: int = 500,
+) -> Dict[str, ArgoWorkflow]:
+    """
+    Query summaries of multiple workflows with list requests to Argo
+
+    Args:
+        ids: workflow IDs to be queried, None for all workflows matching
+            the label selector
+        label_selector: label selector of workflows, e.g.
+            "workflows.argoproj.io/phase=Running"
+        namespace: k8s namespace, default to config["namespace"]
+        host: URL of the Argo server, default to config["host"]
+        token: request the Argo server with the token, default to
+            config["token"]
+        fields: fields of each workflow to be included, default to name,
+            uid, labels, phase, progress, message, start and finish time
+        limit: maximum number of workflows in each page
+    Returns:
+        a dict from workflow ID to an ArgoWorkflow object with the fields
+    """
+    namespace = namespace if namespace is not None else config["namespace"]
+    api_client = get_argo_api_client(
+        host if host is not None else config["host"],
+        token if token is not None else config["token"])
+    if fields is None:
+        fields = ["metadata.name", "metadata.uid", "metadata.labels",
+                  "status.phase", "status.progress", "status.message",
+                  "status.startedAt", "status.finishedAt"]
+    if "metadata.name" not in fields:
+        fields = ["metadata.name"] + fields
+    query_params = [
+        ('fields', ','.join(["metadata.continue"] +
+                            ["items." + f for f in fields])),
+        ('listOptions.limit', str(limit))]
+    if label_selector is not None:
+        query_params.append(('listOptions.labelSelector', label_selector))
+    if ids is not None and len(ids) == 1:
+        query_params.append(('listOptions.fieldSelector',
+                             'metadata.name=%s' % ids[0]))
+
+    workflows = {}
+    cont = None
+    while True:
+        params = query_params if cont is None else query_params + [
+            ('listOptions.continue', cont)]
+        response = api_client.call_api(
+            '/api/v1/workflows/%s' % namespace, 'GET',
+            response_type=object, _return_http_data_only=True,
+            query_params=params)
+        for item in response.get("items") or []:
+            name = item["metadata"]["name"]
+            if ids is None or name in ids:
+                workflows[name] = ArgoWorkflow(item)
+        cont = (response.get("metadata") or {}).get("continue")
+        if not cont:
+            break
+    return workflows
+
+
+# responses of Workflow.query, completed workflows are cached permanently
+# and others are validated by resource version
+query_cache = OrderedDict()
+query_cache_lock = threading.Lock()
+# fields making a response large enough to be worth validating the cache
+large_fields = ["spec", "status.nodes", "status.storedTemplates",
+                "status.storedWorkflowTemplateSpec"]
+
+
+def fields_for_query_cache(fields):
+    # the resource version and phase are required for validating the cache
+    if fields is None:
+        return None
+    return fields + [f for f in ["metadata.resourceVersion", "status.phase"]
+                     if f not in fields]
+
+
+def is_small_projection(fields):
+    """
+    Whether a projection of a workflow is small, for which a plain query
+    costs no more than validating the cache
+    """
+    if fields is None:
+        return False
+    for f in fields:
+        for large in large_fields:
+            if f == large or f.startswith(large + ".") or large.startswith(
+                    f + "."):
+                return False
+    return True
+
+
+def query_cache_entry(response, archived=False):
+    phase = (response.get("status") or {}).get("phase")
+    return {
+        "resourceVersion": (response.get("metadata") or {}).get(
+            "resourceVersion"),
+        "completed": archived or phase in ["Succeeded", "Failed", "Error"],
+        "response": response}
+
+
+def get_query_cache_path(cache_key):
+    # grouped by workflow ID for invalidation
+    return os.path.join(config["query_cache_dir"], str(cache_key[2]),
+                        hashlib.sha256(json.dumps(cache_key).encode(
+                        )).hexdigest() + ".json")
+
+
+def get_query_cache(cache_key):
+    with query_cache_lock:
+        if cache_key in query_cache:
+            query_cache.move_to_end(cache_key)
+            return query_cache[cache_key]
+    if config["query_cache_dir"] is not None:
+        path = get_query_cache_path(cache_key)
+        if os.path.isfile(path):
+            try:
+                with open(path, "r") as f:
+                    entry = json.load(f)
+                put_query_cache(cache_key, entry)
+                return entry
+            except Exception:
+                logging.warning("Failed to load query cache %s" % path)
+    return None
+
+
+def put_query_cache(cache_key, entry):
+    with query_cache_lock:
+        query_cache[cache_key] = entry
+        query_cache.move_to_end(cache_key)
+        while len(query_cache) > config["query_cache_size"]:
+            query_cache.popitem(last=False)
+
+
+def set_query_cache(cache_key, entry):
+    # small responses of running workflows are not worth caching
+    if not entry["completed"] and is_small_projection(cache_key[4]):
+        return
+    put_query_cache(cache_key, entry)
+    if config["query_cache_dir"] is not None and entry["completed"]:
+        path = get_query_cache_path(cache_key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = "%s.%s" % (path, randstr())
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+
+def invalidate_query_cache(id):
+    with query_cache_lock:
+        for cache_key in list(query_cache):
+            if cache_key[2] == id:
+                del query_cache[cache_key]
+    if config["query_cache_dir"] is not None:
+        shutil.rmtree(os.path.join(config["query_cache_dir"], str(id)),
+                      ignore_errors=True)
+
+
+class WatchState:
+    """
+    State of watching a workflow through the event stream of Argo, shared by
+    the synchronous and asynchronous clients
+
+    Args:
+        id: workflow ID
+    """
+
+    def __init__(self, id: str) -> None:
+        self.id = id
+        self.phases = {}
+        self.resource_version = None
+        self.failures = 0
+        self.finished = False
+
+    def query_params(self) -> list:
+        query_params = [
+            ('listOptions.fieldSelector', 'metadata.name=%s' % self.id),
+            ('fields', 'result.type,result.object.metadata.'
+             'resourceVersion,result.object.status.phase,'
+             'result.object.status.nodes')]
+        # resume from the last seen resource version
+        if self.resource_version is not None:
+            query_params.append(('listOptions.resourceVersion',
+                                 self.resource_version))
+        return query_params
+
+    def handle_event(self, event: dict) -> List[ArgoStep]:
+        """
+        Handle an event, return steps whose phase changed
+        """
+        if "error" in event:
+            # e.g. the resource version is too old
+            self.resource_version = None
+            raise RuntimeError(event["error"])
+        result = event.get("result", {})
+        if result.get("type") == "DELETED":
+            self.finished = True
+            return []
+        self.failures = 0
+        obj = result.get("object", {})
+        if obj.get("metadata", {}).get("resourceVersion"):
+            self.resource_version = obj["metadata"]["resourceVersion"]
+        status = obj.get("status") or {}
+        nodes = [node for node in (status.get("nodes") or {}).values()
+                 if node.get("startedAt") is not None]
+        steps = []
+        for node in sorted(nodes, key=lambda x: x["startedAt"]):
+            if self.phases.get(node["id"]) != node.get("phase"):
+                self.phases[node["id"]] = node.get("phase")
+                steps.append(ArgoStep(node))
+        if status.get("phase") in ["Succeeded", "Failed", "Error"]:
+            self.finished = True
+        return steps
+
+    def handle_error(self, error: Exception, retries: int) -> float:
+        """
+        Handle an interruption of the event stream, raise it beyond retries,
+        return the seconds to wait before reconnecting
+        """
+        self.failures += 1
+        if self.failures > retries:
+            raise error
+        logging.warning("Watch workflow %s interrupted: %s, reconnecting" % (
+            self.id, error))
+        return min(2 ** self.failures, 30)
+
+
+def parse_json_line(line: bytes) -> Optional[dict]:
+    """
+    Parse a line of newline delimited JSON, None for empty lines
+    """
+    line = line.strip()
+    # server-sent events are prefixed with "data:"
+    if line.startswith(b"data:"):
+        line = line[5:].strip()
+    if line.startswith(b"{"):
+        return json.loads(line)
+    return None
+
+
+def iter_json_lines(response):
+    """
+    Iterate objects of a stream of newline delimited JSON
+    """
+    buf = b""
+    try:
+        for chunk in response.stream(65536):
+            buf += chunk
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                obj = parse_json_line(line)
+                if obj is not None:
+                    yield obj
+        obj = parse_json_line(buf)
+        if obj is not None:
+            yield obj
+    finally:
+        response.release_conn()